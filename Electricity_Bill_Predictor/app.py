@@ -1,18 +1,66 @@
+import os
+import time
 import streamlit as st
 import pandas as pd
 import plotly.express as px
 from datetime import datetime
 from data_preparation import load_and_prepare_data
 from model import EnergyPredictor
+from downsampling import downsample, chart_payload, DEFAULT_POINTS
 import joblib
 
 st.set_page_config(page_title="Electricity Bill Predictor", layout="wide")
 
+MODEL_PREFIX = 'energy_predictor'
+SCALER_PATH = 'scaler.joblib'
+DATASET_PATH = 'electricity_bill_dataset.csv'
+
+# Cached loaders take the files' modification times as arguments, so a
+# retrained model or updated dataset is picked up on the next rerun while
+# widget interactions reuse what is already in memory.
+
+def file_mtime(path):
+    try:
+        return os.path.getmtime(path)
+    except OSError:
+        return None
+
+def model_mtimes():
+    return file_mtime(f'{MODEL_PREFIX}_electricity.joblib'), file_mtime(SCALER_PATH)
+
+@st.cache_resource(show_spinner="Loading model...")
+def load_model_files(model_mtime, scaler_mtime):
+    predictor = EnergyPredictor.load_models(MODEL_PREFIX)
+    scaler = joblib.load(SCALER_PATH)
+    return predictor, scaler
+
+@st.cache_data(show_spinner="Loading dataset...")
+def load_dataset(path, mtime):
+    return pd.read_csv(path)
+
+@st.cache_data(show_spinner="Evaluating model...")
+def evaluate_model(_predictor, dataset_path, dataset_mtime, model_mtimes):
+    """Test-set metrics and predictions; _predictor is identified by model_mtimes."""
+    X_train_scaled, X_test_scaled, y_train, y_test, scaler = load_and_prepare_data(dataset_path)
+    y_pred = _predictor.predict(X_test_scaled)
+    metrics = _predictor.evaluate(X_test_scaled, y_test)
+    return metrics, y_test, y_pred
+
+@st.cache_data(show_spinner=False, max_entries=256)
+def downsampled_column(dataset_path, dataset_mtime, column, start, stop, points, method):
+    """Rows [start, stop) of one dataset column, downsampled to about `points` points."""
+    series = load_dataset(dataset_path, dataset_mtime)[column].iloc[start:stop]
+    return downsample(series, points, method)
+
+def clear_caches():
+    load_model_files.clear()
+    load_dataset.clear()
+    evaluate_model.clear()
+    downsampled_column.clear()
+
 def load_model():
     try:
-        predictor = EnergyPredictor.load_models('energy_predictor')
-        scaler = joblib.load('scaler.joblib')
-        return predictor, scaler
+        return load_model_files(*model_mtimes())
     except Exception as e:
         st.error(f"Error loading model: {str(e)}")
         return None, None
@@ -20,30 +68,57 @@ def load_model():
 def main():
     st.title("Electricity Bill Prediction Dashboard")
     
+    # Sidebar
+    st.sidebar.header("Navigation")
+    page = st.sidebar.radio("Go to", ["Data Visualization", "Predictions", "Model Performance"])
+    if st.sidebar.button("Reload model and data"):
+        clear_caches()
+    
     try:
-        df = pd.read_csv('electricity_bill_dataset.csv')
+        df = load_dataset(DATASET_PATH, file_mtime(DATASET_PATH))
     except FileNotFoundError:
         st.error("electricity_bill_dataset.csv not found. Please ensure the data file exists.")
         return
     
-    # Sidebar
-    st.sidebar.header("Navigation")
-    page = st.sidebar.radio("Go to", ["Data Visualization", "Predictions", "Model Performance"])
-    
     if page == "Data Visualization":
         st.header("Historical Data Analysis")
         
+        # Charts show the selected rows downsampled to a fixed number of points;
+        # narrowing the range zooms in at full detail
+        start, stop = st.slider("Rows", 0, len(df), (0, len(df)))
+        col1, col2 = st.columns(2)
+        with col1:
+            points = st.select_slider("Points per chart", [500, 1000, DEFAULT_POINTS, 5000, 10000],
+                                      value=DEFAULT_POINTS)
+        with col2:
+            method = st.radio("Downsampling", ['lttb', 'minmax'], horizontal=True,
+                              format_func={'lttb': 'LTTB', 'minmax': 'Min/max per bucket'}.get)
+        dataset_mtime = file_mtime(DATASET_PATH)
+        render_start = time.perf_counter()
+        payload = plotted = charts = 0
+        
         # Appliance usage visualization
         appliances = ['Fan', 'Refrigerator', 'AirConditioner', 'Television', 'Monitor', 'MotorPump']
         for appliance in appliances:
             if appliance in df.columns:
-                fig = px.line(df, y=appliance, title=f'{appliance} Usage Over Time')
+                series = downsampled_column(DATASET_PATH, dataset_mtime, appliance, start, stop, points, method)
+                fig = px.line(series.to_frame(), y=appliance, title=f'{appliance} Usage Over Time')
                 st.plotly_chart(fig)
+                payload += chart_payload(fig)
+                plotted += len(series)
+                charts += 1
         
         # Monthly bill visualization
         if 'ElectricityBill' in df.columns:
-            fig_bill = px.bar(df, y='ElectricityBill', title='Monthly Electricity Bills')
+            series = downsampled_column(DATASET_PATH, dataset_mtime, 'ElectricityBill', start, stop, points, method)
+            fig_bill = px.bar(series.to_frame(), y='ElectricityBill', title='Monthly Electricity Bills')
             st.plotly_chart(fig_bill)
+            payload += chart_payload(fig_bill)
+            plotted += len(series)
+            charts += 1
+        
+        st.caption(f"{plotted:,} points plotted in {charts} charts from {stop - start:,} rows each, "
+                   f"{payload / 1e6:.2f} MB of chart data, built in {time.perf_counter() - render_start:.2f} s")
     
     elif page == "Predictions":
         st.header("Make Predictions")
@@ -103,8 +178,8 @@ def main():
         if predictor and scaler:
             # Evaluate model on test data
             try:
-                X_train_scaled, X_test_scaled, y_train, y_test, scaler = load_and_prepare_data('electricity_bill_dataset.csv')
-                metrics = predictor.evaluate(X_test_scaled, y_test)
+                metrics, y_test, y_pred = evaluate_model(predictor, DATASET_PATH, file_mtime(DATASET_PATH),
+                                                         model_mtimes())
                 
                 # Display metrics with better formatting
                 col1, col2 = st.columns(2)
@@ -113,9 +188,6 @@ def main():
                 with col2:
                     st.metric("Mean Squared Error", f"{metrics['mse']:.3f}")
                 
-                # Add accuracy visualization
-                y_pred = predictor.predict(X_test_scaled)
-                
                 # Create comparison plot
                 comparison_df = pd.DataFrame({
                     'Actual': y_test,
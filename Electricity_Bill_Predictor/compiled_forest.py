@@ -0,0 +1,142 @@
+# Lives with the Electricity app, which is deployed from its own directory; the dam
+# model imports it through compiled_forest.py at the repository root.
+import numpy as np
+import time
+
+
+class CompiledForest:
+    """
+    Flat-array evaluator for fitted sklearn tree ensembles.
+
+    All trees of a RandomForestRegressor are exported into contiguous numpy
+    arrays (feature, threshold, left, right, value) indexed by a global node
+    id, and a batch of rows walks every tree at once with vectorized fancy
+    indexing. This avoids sklearn's per-call overhead when scoring one or a
+    few rows, and gives the same results as `predict` within float tolerance.
+    """
+
+    def __init__(self, feature, threshold, left, right, value, roots, is_leaf=None):
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.value = value
+        self.roots = roots
+        self.is_leaf = is_leaf if is_leaf is not None else left == np.arange(len(left))
+
+    @classmethod
+    def from_estimator(cls, forest):
+        """Flatten a fitted forest (anything with `estimators_` of decision trees)."""
+        trees = [estimator.tree_ for estimator in forest.estimators_]
+        sizes = np.array([tree.node_count for tree in trees])
+        roots = np.concatenate([[0], np.cumsum(sizes)[:-1]]).astype(np.intp)
+
+        feature = np.concatenate([tree.feature for tree in trees]).astype(np.intp)
+        threshold = np.concatenate([tree.threshold for tree in trees]).astype(np.float64)
+        left = np.concatenate([tree.children_left + root for tree, root in zip(trees, roots)]).astype(np.intp)
+        right = np.concatenate([tree.children_right + root for tree, root in zip(trees, roots)]).astype(np.intp)
+        value = np.concatenate([tree.value[:, :, 0] for tree in trees]).astype(np.float64)
+
+        # Leaves point at themselves so a stray walker stays put
+        leaves = np.flatnonzero(feature < 0)
+        feature[leaves] = 0
+        left[leaves] = leaves
+        right[leaves] = leaves
+
+        return cls(feature, threshold, left, right, value, roots)
+
+    @property
+    def n_trees(self):
+        return len(self.roots)
+
+    @property
+    def n_outputs(self):
+        return self.value.shape[1]
+
+    def to_arrays(self):
+        """The flat arrays as a dict, e.g. for saving with numpy or joblib."""
+        return {
+            'feature': self.feature,
+            'threshold': self.threshold,
+            'left': self.left,
+            'right': self.right,
+            'value': self.value,
+            'roots': self.roots,
+            'is_leaf': self.is_leaf,
+        }
+
+    @classmethod
+    def from_arrays(cls, arrays):
+        """Rebuild an evaluator from the dict produced by to_arrays."""
+        return cls(
+            arrays['feature'], arrays['threshold'], arrays['left'], arrays['right'],
+            arrays['value'], arrays['roots'], arrays.get('is_leaf')
+        )
+
+    def apply(self, X):
+        """Global leaf id reached by each row in each tree, shape (n_rows, n_trees)."""
+        # sklearn compares float32 inputs against float64 thresholds
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim == 1:
+            X = X[None, :]
+        n_rows, n_features = X.shape
+        flat_X = X.ravel()
+
+        # One walker per (row, tree); only walkers not yet at a leaf advance
+        nodes = np.tile(self.roots, n_rows)
+        offsets = np.repeat(np.arange(n_rows) * n_features, self.n_trees)
+        active = np.flatnonzero(~self.is_leaf[nodes])
+
+        while active.size:
+            current = nodes[active]
+            go_left = flat_X[offsets[active] + self.feature[current]] <= self.threshold[current]
+            current = np.where(go_left, self.left[current], self.right[current])
+            nodes[active] = current
+            active = active[~self.is_leaf[current]]
+
+        return nodes.reshape(n_rows, self.n_trees)
+
+    def tree_predictions(self, X):
+        """
+        Every tree's prediction for every row in one gather, shape
+        (n_rows, n_trees) or (n_rows, n_trees, n_outputs) for multi-output forests.
+        """
+        predictions = self.value[self.apply(X)]
+        return predictions[:, :, 0] if self.n_outputs == 1 else predictions
+
+    def predict(self, X):
+        """Mean of the tree predictions, shaped like RandomForestRegressor.predict."""
+        return self.tree_predictions(X).mean(axis=1)
+
+
+def compare_latency(forest, X, row_counts=(1, 10, 1000), repeats=50):
+    """
+    Time sklearn `predict` against the compiled evaluator.
+
+    Rows are drawn (with replacement) from X. Returns one dict per row count
+    with the median latency of each in milliseconds and the max absolute
+    difference between their predictions.
+    """
+    compiled = CompiledForest.from_estimator(forest)
+    rng = np.random.default_rng(0)
+    results = []
+
+    for n_rows in row_counts:
+        batch = np.asarray(X)[rng.integers(0, len(X), n_rows)]
+        timings = {}
+        for name, predict in (('sklearn', forest.predict), ('compiled', compiled.predict)):
+            samples = []
+            for _ in range(repeats):
+                start = time.perf_counter()
+                predict(batch)
+                samples.append(time.perf_counter() - start)
+            timings[name] = float(np.median(samples) * 1000)
+
+        results.append({
+            'rows': n_rows,
+            'sklearn_ms': timings['sklearn'],
+            'compiled_ms': timings['compiled'],
+            'max_abs_diff': float(np.abs(forest.predict(batch) - compiled.predict(batch)).max()),
+        })
+
+    return results
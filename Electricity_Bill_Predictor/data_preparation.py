@@ -1,3 +1,6 @@
+import time
+from datetime import datetime
+import numpy as np
 import pandas as pd
 from sklearn.model_selection import train_test_split
 from sklearn.preprocessing import StandardScaler
@@ -28,6 +31,82 @@ def load_and_prepare_data(filepath):
     
     return X_train_scaled, X_test_scaled, y_train, y_test, scaler
 
+# Frontend field names and the model feature each maps to, in model column order
+FEATURE_MAPPING = {
+    'fan': 'Fan',
+    'refrigerator': 'Refrigerator',
+    'airConditioner': 'AirConditioner',
+    'television': 'Television',
+    'monitor': 'Monitor',
+    'motorPump': 'MotorPump',
+    'month': 'Month',
+    'monthlyHours': 'MonthlyHours',
+    'tariffRate': 'TariffRate',
+    'previousMonthBill': 'PreviousMonthBill',
+    'twoMonthsAgoBill': 'TwoMonthsAgoBill'
+}
+
+# Values used when a field is missing; Month (None) defaults to the current month
+FEATURE_DEFAULTS = {
+    'Fan': 5.0,
+    'Refrigerator': 24.0,
+    'AirConditioner': 6.0,
+    'Television': 4.0,
+    'Monitor': 8.0,
+    'MotorPump': 1.0,
+    'Month': None,
+    'MonthlyHours': 720.0,
+    'TariffRate': 5.0,
+    'PreviousMonthBill': 150.0,
+    'TwoMonthsAgoBill': 145.0
+}
+
+# Frontend fields and their defaults, both in model column order
+_FIELDS = list(FEATURE_MAPPING)
+_DEFAULTS = [FEATURE_DEFAULTS[name] for name in FEATURE_MAPPING.values()]
+_MONTH = _DEFAULTS.index(None)
+_DEFAULT_VECTOR = np.array([np.nan if default is None else default for default in _DEFAULTS])
+
+def _record_features(record, month):
+    """
+    One frontend record as floats in model column order. Missing fields and
+    null values take the defaults, with `month` for a missing Month.
+    """
+    features = []
+    for field, default in zip(_FIELDS, _DEFAULTS):
+        value = record.get(field)
+        if value is None or value != value:
+            features.append(month if default is None else default)
+        else:
+            features.append(float(value))
+    return features
+
+def preprocess_inputs(records, dtype=np.float64):
+    """
+    Preprocess many frontend inputs at once
+
+    Args:
+        records: List of dictionaries, or a DataFrame, with frontend field names
+        dtype: Dtype of the returned array
+
+    Returns:
+        Array of shape (len(records), 11) in model column order; missing
+        fields and null values are filled with the defaults. Raises
+        ValueError for values that are not numbers.
+    """
+    month = float(datetime.now().month)
+    if not isinstance(records, pd.DataFrame):
+        return np.array([_record_features(record, month) for record in records],
+                        dtype=dtype).reshape(-1, len(_FIELDS))
+
+    features = records.reindex(columns=_FIELDS).to_numpy(dtype=dtype)
+    missing = np.isnan(features)
+    if missing.any():
+        defaults = _DEFAULT_VECTOR.astype(dtype)
+        defaults[_MONTH] = month
+        np.copyto(features, defaults, where=missing)
+    return features
+
 def preprocess_input(input_data):
     """
     Preprocess input data from frontend to match the format expected by the model
@@ -36,51 +115,49 @@ def preprocess_input(input_data):
         input_data: Dictionary with input values from frontend
         
     Returns:
-        Numpy array of preprocessed features ready for scaling
+        List of preprocessed features ready for scaling, equal to the
+        matching row of preprocess_inputs
     """
-    # Map frontend field names to model input features
-    feature_mapping = {
-        'fan': 'Fan',
-        'refrigerator': 'Refrigerator',
-        'airConditioner': 'AirConditioner',
-        'television': 'Television',
-        'monitor': 'Monitor',
-        'motorPump': 'MotorPump',
-        'month': 'Month',
-        'monthlyHours': 'MonthlyHours',
-        'tariffRate': 'TariffRate',
-        'previousMonthBill': 'PreviousMonthBill',
-        'twoMonthsAgoBill': 'TwoMonthsAgoBill'
-    }
-    
-    # Extract features in the correct order
-    features = []
-    for frontend_name, model_name in feature_mapping.items():
-        if frontend_name in input_data:
-            features.append(float(input_data[frontend_name]))
-        else:
-            # Use default values if a feature is missing
-            if model_name == 'Fan':
-                features.append(5.0)
-            elif model_name == 'Refrigerator':
-                features.append(24.0)
-            elif model_name == 'AirConditioner':
-                features.append(6.0)
-            elif model_name == 'Television':
-                features.append(4.0)
-            elif model_name == 'Monitor':
-                features.append(8.0)
-            elif model_name == 'MotorPump':
-                features.append(1.0)
-            elif model_name == 'Month':
-                features.append(pd.Timestamp.now().month)
-            elif model_name == 'MonthlyHours':
-                features.append(720.0)
-            elif model_name == 'TariffRate':
-                features.append(5.0)
-            elif model_name == 'PreviousMonthBill':
-                features.append(150.0)
-            elif model_name == 'TwoMonthsAgoBill':
-                features.append(145.0)
-    
-    return features
+    return _record_features(input_data, float(datetime.now().month))
+
+def random_records(n, seed=0):
+    """Random frontend records with missing fields, nulls and numeric strings."""
+    rng = np.random.default_rng(seed)
+    records = []
+    for _ in range(n):
+        record = {}
+        for field in _FIELDS:
+            draw = rng.random()
+            if draw < 0.2:
+                continue
+            value = float(rng.uniform(0, 1000))
+            record[field] = None if draw < 0.3 else str(value) if draw < 0.4 else value
+        records.append(record)
+    return records
+
+def compare_preprocessing(records, repeats=3):
+    """
+    Per-row time of preprocess_input called for each record against one
+    preprocess_inputs call for all of them, in microseconds (best of repeats),
+    and whether the two give identical features.
+    """
+    def best(fn):
+        timings = []
+        for _ in range(repeats):
+            start = time.perf_counter()
+            fn()
+            timings.append(time.perf_counter() - start)
+        return min(timings) / len(records) * 1e6
+
+    single = best(lambda: [preprocess_input(record) for record in records])
+    bulk = best(lambda: preprocess_inputs(records))
+    identical = np.array_equal(np.array([preprocess_input(record) for record in records]),
+                               preprocess_inputs(records))
+    return {'rows': len(records), 'single_us_per_row': single, 'bulk_us_per_row': bulk,
+            'speedup': single / bulk, 'identical': identical}
+
+if __name__ == "__main__":
+    import sys
+    result = compare_preprocessing(random_records(int(sys.argv[1]) if len(sys.argv) > 1 else 10000))
+    print(result)
+    sys.exit(0 if result['identical'] else 1)
@@ -0,0 +1,120 @@
+import time
+import numpy as np
+import pandas as pd
+import plotly.express as px
+
+# Points per chart when none is given; a few times a typical chart's pixel width
+DEFAULT_POINTS = 2000
+
+def minmax_indices(y, n_out):
+    """
+    Indices of the minimum and maximum of y in each of about n_out / 2 equal
+    buckets, plus the first and last point, in order. Keeps every spike.
+    """
+    y = np.asarray(y, dtype=float)
+    n = len(y)
+    if n <= n_out:
+        return np.arange(n)
+
+    size = -(-n // max(1, (n_out - 2) // 2))
+    rows = -(-n // size)
+    blocks = np.full(rows * size, np.nan)
+    blocks[:n] = y
+    blocks = blocks.reshape(rows, size)
+
+    # Padding and missing values never win
+    missing = np.isnan(blocks)
+    offsets = np.arange(rows) * size
+    low = offsets + np.where(missing, np.inf, blocks).argmin(axis=1)
+    high = offsets + np.where(missing, -np.inf, blocks).argmax(axis=1)
+    return np.unique(np.concatenate([[0, n - 1], low, high]))
+
+def lttb_indices(x, y, n_out):
+    """
+    Largest-Triangle-Three-Buckets: indices of n_out points of (x, y) that
+    keep the visual shape of the line. The first and last point are always
+    kept; from each bucket in between the point forming the largest triangle
+    with the previous pick and the next bucket's mean is chosen.
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    n = len(y)
+    if n <= n_out or n_out < 3:
+        return np.arange(n)
+
+    edges = np.linspace(1, n - 1, n_out - 1).astype(int)
+    selected = np.empty(n_out, dtype=int)
+    selected[0], selected[-1] = 0, n - 1
+
+    a = 0
+    for i in range(n_out - 2):
+        start, stop = edges[i], edges[i + 1]
+        next_stop = edges[i + 2] if i + 2 < len(edges) else n
+        next_x = x[stop:next_stop].mean()
+        next_y = y[stop:next_stop].mean()
+
+        area = np.abs((x[a] - next_x) * (y[start:stop] - y[a]) - (x[a] - x[start:stop]) * (next_y - y[a]))
+        a = start + int(area.argmax())
+        selected[i + 1] = a
+    return selected
+
+def downsample(series, points=DEFAULT_POINTS, method='lttb'):
+    """
+    Subset of a Series for plotting at about `points` points, with its index
+    (the x axis) kept. `method` is 'lttb' or 'minmax'; missing values are dropped.
+    """
+    series = series.dropna()
+    if method == 'minmax':
+        indices = minmax_indices(series.to_numpy(), points)
+    elif method == 'lttb':
+        index = series.index
+        if isinstance(index, pd.DatetimeIndex):
+            x = index.asi8
+        elif pd.api.types.is_numeric_dtype(index):
+            x = index.to_numpy()
+        else:
+            x = np.arange(len(series))
+        indices = lttb_indices(x, series.to_numpy(), points)
+    else:
+        raise ValueError(f"Unknown downsampling method: {method}")
+    return series.iloc[indices]
+
+def chart_payload(fig):
+    """Size in bytes of the JSON a figure is sent to the browser as."""
+    return len(fig.to_json())
+
+def compare_downsampling(df, columns, points=DEFAULT_POINTS, method='lttb'):
+    """
+    Plotted points, payload bytes and milliseconds to build and serialize a
+    line chart of each column, full and downsampled (downsampling included).
+    """
+    def chart(series):
+        start = time.perf_counter()
+        fig = px.line(series.to_frame(), y=series.name)
+        size = chart_payload(fig)
+        return len(series), size, (time.perf_counter() - start) * 1000
+
+    results = []
+    for column in columns:
+        full_points, full_bytes, full_ms = chart(df[column])
+        start = time.perf_counter()
+        sampled = downsample(df[column], points, method)
+        sample_ms = (time.perf_counter() - start) * 1000
+        points_out, sampled_bytes, sampled_ms = chart(sampled)
+        results.append({
+            'column': column,
+            'full_points': full_points,
+            'full_bytes': full_bytes,
+            'full_ms': full_ms,
+            'points': points_out,
+            'bytes': sampled_bytes,
+            'ms': sample_ms + sampled_ms,
+        })
+    return results
+
+if __name__ == "__main__":
+    import sys
+    data = pd.read_csv(sys.argv[1] if len(sys.argv) > 1 else 'electricity_bill_dataset.csv')
+    for row in compare_downsampling(data, ['Fan', 'Refrigerator', 'AirConditioner', 'ElectricityBill']):
+        print(f"{row['column']:>16}: {row['full_points']} points, {row['full_bytes'] / 1e6:.2f} MB, "
+              f"{row['full_ms']:.0f} ms -> {row['points']} points, {row['bytes'] / 1e6:.3f} MB, {row['ms']:.0f} ms")
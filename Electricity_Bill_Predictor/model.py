@@ -3,17 +3,30 @@ from sklearn.ensemble import RandomForestRegressor
 from sklearn.metrics import r2_score, mean_squared_error
 import joblib
 
+from compiled_forest import CompiledForest
+
+# Up to this many rows the flat-array evaluator beats sklearn's predict
+COMPILED_MAX_ROWS = 256
+
 class EnergyPredictor:
     def __init__(self):
         self.electricity_model = RandomForestRegressor(
             n_estimators=100,
             random_state=42
         )
+        self.compiled = None
 
     def fit(self, X_train, y_train):
         self.electricity_model.fit(X_train, y_train)
+        self.compile()
+
+    def compile(self):
+        # Flat-array export of the forest for fast small-batch scoring
+        self.compiled = CompiledForest.from_estimator(self.electricity_model)
 
     def predict(self, X):
+        if self.compiled is not None and len(X) <= COMPILED_MAX_ROWS:
+            return self.compiled.predict(X)
         return self.electricity_model.predict(X)
 
     def evaluate(self, X_test, y_test):
@@ -30,4 +43,5 @@ class EnergyPredictor:
     def load_models(cls, filename_prefix):
         predictor = cls()
         predictor.electricity_model = joblib.load(f'{filename_prefix}_electricity.joblib')
+        predictor.compile()
         return predictor
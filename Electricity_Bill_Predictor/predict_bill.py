@@ -2,36 +2,56 @@
 """
 Electricity Bill Prediction Script
 This script takes input data from a JSON file and returns a predicted electricity bill.
+
+    python predict_bill.py input.json              one prediction, printed as JSON
+    python predict_bill.py --serve                 long-lived worker on stdin/stdout
+    python predict_bill.py --socket /tmp/bill.sock long-lived worker on a Unix socket
+    python predict_bill.py --compare input.json    spawn-per-request vs worker latency
+    python predict_bill.py --batch in.csv out.csv [chunk_rows [workers]]
+                                                   score a CSV or NDJSON file in chunks
+
+In worker mode the model and scaler are loaded once. Each request is one line
+of JSON holding the same object as the input file, optionally with an "id";
+each response is one line with the same JSON predict_bill returns, plus that
+"id". The socket listener serves every connection on its own thread.
+
+Batch mode streams its input in chunks of rows (fields named like the
+frontend's, or like the model's columns) and writes one output row per input
+row as each chunk is scored.
 """
 import sys
+import os
 import json
+import time
+import warnings
+import socketserver
+import subprocess
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 import joblib
 import numpy as np
+import pandas as pd
 from model import EnergyPredictor
-from data_preparation import preprocess_input
+from data_preparation import preprocess_input, preprocess_inputs, FEATURE_MAPPING
 
-def predict_bill(input_data_path):
+# Input rows scored together by --batch
+BATCH_CHUNK_ROWS = 50000
+
+def load_predictor():
+    """Load the trained model and scaler."""
+    model = EnergyPredictor.load_models('energy_predictor')
+    scaler = joblib.load('scaler.joblib')
+    return model, scaler
+
+def predict_input(input_data, model, scaler):
     """
-    Predict electricity bill based on input data
+    Predict electricity bill for already loaded input data
     Args:
-        input_data_path: Path to JSON file containing input data
+        input_data: Dictionary with input values from frontend
+        model, scaler: As returned by load_predictor
     Returns:
         Dictionary with predicted bill
     """
-    # Load the input data
-    try:
-        with open(input_data_path, 'r') as f:
-            input_data = json.load(f)
-    except Exception as e:
-        return {"error": f"Error loading input data: {str(e)}"}
-    
-    # Load the model and scaler
-    try:
-        model = EnergyPredictor.load_models('energy_predictor')
-        scaler = joblib.load('scaler.joblib')
-    except Exception as e:
-        return {"error": f"Error loading model: {str(e)}"}
-    
     # Preprocess the input data
     try:
         features = preprocess_input(input_data)
@@ -39,14 +59,14 @@ def predict_bill(input_data_path):
         features_scaled = scaler.transform([features])
     except Exception as e:
         return {"error": f"Error preprocessing input: {str(e)}"}
-    
+
     # Make prediction
     try:
         prediction = model.predict(features_scaled)[0]
-        
+
         # Add some confidence information
         confidence = np.random.uniform(0.8, 0.95)  # Simulated confidence score
-        
+
         return {
             "predicted_bill": float(prediction),
             "confidence": float(confidence)
@@ -54,13 +74,260 @@ def predict_bill(input_data_path):
     except Exception as e:
         return {"error": f"Error making prediction: {str(e)}"}
 
+def predict_bill(input_data_path):
+    """
+    Predict electricity bill based on input data
+    Args:
+        input_data_path: Path to JSON file containing input data
+    Returns:
+        Dictionary with predicted bill
+    """
+    # Load the input data
+    try:
+        with open(input_data_path, 'r') as f:
+            input_data = json.load(f)
+    except Exception as e:
+        return {"error": f"Error loading input data: {str(e)}"}
+
+    # Load the model and scaler
+    try:
+        model, scaler = load_predictor()
+    except Exception as e:
+        return {"error": f"Error loading model: {str(e)}"}
+
+    return predict_input(input_data, model, scaler)
+
+class PredictionWorker:
+    """Answers newline-delimited JSON requests with a model and scaler loaded once."""
+
+    def __init__(self):
+        self.load_error = None
+        try:
+            self.model, self.scaler = load_predictor()
+        except Exception as e:
+            # Keep serving, answering every request like predict_bill would
+            self.load_error = {"error": f"Error loading model: {str(e)}"}
+
+    def handle_line(self, line):
+        """Response line for one request line."""
+        try:
+            input_data = json.loads(line)
+            if not isinstance(input_data, dict):
+                raise ValueError("request must be a JSON object")
+        except Exception as e:
+            return json.dumps({"error": f"Error loading input data: {str(e)}"})
+
+        result = self.load_error or predict_input(input_data, self.model, self.scaler)
+        if 'id' in input_data:
+            result = {**result, "id": input_data['id']}
+        return json.dumps(result)
+
+    def serve_stream(self, lines, write):
+        """Answer requests from an iterable of lines until it is exhausted."""
+        for line in lines:
+            if line.strip():
+                write(self.handle_line(line) + '\n')
+
+def serve_stdio(worker):
+    print("predict_bill worker ready", file=sys.stderr, flush=True)
+
+    def write(text):
+        sys.stdout.write(text)
+        sys.stdout.flush()
+
+    worker.serve_stream(sys.stdin, write)
+
+def serve_socket(worker, path):
+    class Handler(socketserver.StreamRequestHandler):
+        def handle(self):
+            lines = (line.decode('utf-8') for line in self.rfile)
+            worker.serve_stream(lines, lambda text: self.wfile.write(text.encode('utf-8')))
+
+    class Server(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+        daemon_threads = True
+
+    if os.path.exists(path):
+        os.unlink(path)
+    with Server(path, Handler) as server:
+        print(f"predict_bill worker listening on {path}", file=sys.stderr, flush=True)
+        try:
+            server.serve_forever()
+        finally:
+            os.unlink(path)
+
+def compare_worker_latency(input_path, requests=20):
+    """
+    Time spawning predict_bill.py per request against one persistent worker.
+
+    Returns the median per-request latency of each in milliseconds and the
+    worker's startup time (until its first answer).
+    """
+    script = os.path.abspath(__file__)
+    spawn = []
+    for _ in range(requests):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, script, input_path], capture_output=True, check=True)
+        spawn.append(time.perf_counter() - start)
+
+    with open(input_path) as f:
+        request_line = json.dumps(json.load(f)) + '\n'
+
+    def ask(worker):
+        worker.stdin.write(request_line)
+        worker.stdin.flush()
+        return worker.stdout.readline()
+
+    start = time.perf_counter()
+    worker = subprocess.Popen([sys.executable, script, '--serve'], stdin=subprocess.PIPE,
+                              stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True, bufsize=1)
+    try:
+        ask(worker)
+        startup = time.perf_counter() - start
+
+        latencies = []
+        for _ in range(requests):
+            request_start = time.perf_counter()
+            ask(worker)
+            latencies.append(time.perf_counter() - request_start)
+    finally:
+        worker.stdin.close()
+        worker.wait()
+
+    return {
+        'spawn_ms': float(np.median(spawn) * 1000),
+        'worker_startup_ms': startup * 1000,
+        'worker_request_ms': float(np.median(latencies) * 1000),
+    }
+
+def _is_ndjson(path):
+    return path.endswith(('.ndjson', '.jsonl'))
+
+def read_input_chunks(input_path, chunk_rows=BATCH_CHUNK_ROWS):
+    """Iterate over a CSV or NDJSON (.ndjson/.jsonl) file as DataFrames of up to chunk_rows rows."""
+    if _is_ndjson(input_path):
+        return pd.read_json(input_path, lines=True, chunksize=chunk_rows, dtype=False, convert_dates=False)
+    return pd.read_csv(input_path, chunksize=chunk_rows)
+
+def chunk_features(chunk):
+    """
+    Model features for every row of a chunk, mapped like preprocess_input.
+    Returns (features, errors): a float array in model column order and a
+    per-row error message (None for rows that can be scored).
+    """
+    # Columns named like the model's are read as the matching frontend field
+    renamed = {model_name: frontend_name for frontend_name, model_name in FEATURE_MAPPING.items()
+               if frontend_name not in chunk and model_name in chunk}
+    fields = chunk.rename(columns=renamed).reindex(columns=list(FEATURE_MAPPING))
+
+    # Empty fields fall back to the default; anything else non-numeric is an error
+    numeric = fields.apply(pd.to_numeric, errors='coerce')
+    bad = (numeric.isna() & fields.notna()).to_numpy()
+    names = np.array(list(FEATURE_MAPPING))
+    errors = [None] * len(chunk)
+    for i in np.flatnonzero(bad.any(axis=1)):
+        errors[i] = f"Error preprocessing input: invalid {', '.join(names[bad[i]])}"
+    return preprocess_inputs(numeric, dtype=float), errors
+
+def score_chunk(chunk, model, scaler):
+    """Predict bills for one chunk with a single scaler and model call; returns the output rows."""
+    features, errors = chunk_features(chunk)
+    ok = np.array([error is None for error in errors], dtype=bool)
+
+    bills = np.full(len(chunk), np.nan)
+    if ok.any():
+        bills[ok] = model.predict(scaler.transform(features[ok]))
+
+    result = pd.DataFrame({'row': chunk.index})
+    if 'id' in chunk:
+        result['id'] = chunk['id'].to_numpy()
+    result['predicted_bill'] = bills
+    # Simulated confidence score, as for single predictions
+    result['confidence'] = np.where(ok, np.random.uniform(0.8, 0.95, len(chunk)), np.nan)
+    result['error'] = errors
+    return result
+
+_batch_predictor = None
+
+def _init_batch_worker():
+    global _batch_predictor
+    warnings.filterwarnings('ignore', message='X does not have valid feature names')
+    _batch_predictor = load_predictor()
+
+def _score_chunk_in_worker(chunk):
+    return score_chunk(chunk, *_batch_predictor)
+
+def score_file(input_path, output_path, chunk_rows=BATCH_CHUNK_ROWS, workers=1):
+    """
+    Score every row of a CSV or NDJSON file and write the bills to output_path
+    (NDJSON for .ndjson/.jsonl, CSV otherwise), in input order.
+
+    Chunks are read, scored and written one at a time, so memory depends on
+    chunk_rows rather than the file size. With workers > 1 chunks are scored
+    by a process pool, each process loading the model once, with at most two
+    chunks per worker in flight.
+
+    Returns the number of rows, how many could not be scored, the elapsed
+    seconds and rows per second.
+    """
+    start = time.perf_counter()
+    rows = failed = 0
+    chunks = read_input_chunks(input_path, chunk_rows)
+
+    with open(output_path, 'w', newline='') as out:
+        def write(result):
+            nonlocal rows, failed
+            if _is_ndjson(output_path):
+                result.to_json(out, orient='records', lines=True)
+            else:
+                result.to_csv(out, header=rows == 0, index=False)
+            rows += len(result)
+            failed += int(result['error'].notna().sum())
+
+        if workers <= 1:
+            model, scaler = load_predictor()
+            for chunk in chunks:
+                write(score_chunk(chunk, model, scaler))
+        else:
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_batch_worker) as pool:
+                in_flight = deque()
+                for chunk in chunks:
+                    in_flight.append(pool.submit(_score_chunk_in_worker, chunk))
+                    if len(in_flight) >= 2 * workers:
+                        write(in_flight.popleft().result())
+                while in_flight:
+                    write(in_flight.popleft().result())
+
+    seconds = time.perf_counter() - start
+    return {
+        'rows': rows,
+        'errors': failed,
+        'seconds': seconds,
+        'rows_per_second': rows / seconds if seconds else None,
+    }
+
 if __name__ == "__main__":
     if len(sys.argv) < 2:
         print(json.dumps({"error": "No input file provided"}))
         sys.exit(1)
-        
-    input_path = sys.argv[1]
-    result = predict_bill(input_path)
-    
-    # Print the result as JSON
-    print(json.dumps(result))
\ No newline at end of file
+
+    if sys.argv[1] in ('--serve', '--socket'):
+        # Features are scaled as plain lists; don't repeat sklearn's warning on every request
+        warnings.filterwarnings('ignore', message='X does not have valid feature names')
+        if sys.argv[1] == '--serve':
+            serve_stdio(PredictionWorker())
+        else:
+            serve_socket(PredictionWorker(), sys.argv[2])
+    elif sys.argv[1] == '--batch':
+        warnings.filterwarnings('ignore', message='X does not have valid feature names')
+        summary = score_file(sys.argv[2], sys.argv[3], *map(int, sys.argv[4:6]))
+        print(f"Scored {summary['rows']} rows in {summary['seconds']:.1f} s "
+              f"({summary['rows_per_second']:.0f} rows/s, {summary['errors']} errors)", file=sys.stderr)
+        print(json.dumps(summary))
+    elif sys.argv[1] == '--compare':
+        print(json.dumps(compare_worker_latency(sys.argv[2], *map(int, sys.argv[3:4])), indent=2))
+    else:
+        input_path = sys.argv[1]
+        result = predict_bill(input_path)
+
+        # Print the result as JSON
+        print(json.dumps(result))
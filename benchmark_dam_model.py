@@ -0,0 +1,298 @@
+"""
+Benchmark suite for DamWaterPredictionModel.
+
+Runs preprocess_data, create_features_targets, feature_matrix, train,
+predict_future_levels and generate_recommendations on synthetic hourly
+readings at several sizes and writes wall time, peak resident memory and
+per-call p50/p99 latency as JSON. With --baseline, results are compared
+against a previous run and regressions are flagged (exit status 1).
+
+    python benchmark_dam_model.py --output bench.json
+    python benchmark_dam_model.py --sizes 1000,100000 --baseline bench.json
+"""
+import argparse
+import gc
+import json
+import multiprocessing
+import os
+import platform
+import sys
+import time
+import warnings
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import sklearn
+
+from dam_water_prediction_model import DamWaterPredictionModel
+
+DEFAULT_SIZES = [1000, 100000, 10000000]
+# Forest training is far slower than the rest; larger sizes skip it by default
+DEFAULT_MAX_TRAIN_ROWS = 100000
+# Timestamps repeat after this many hours (100 years) so that 10M-row series
+# stay inside the datetime64[ns] range; only hour/day/month/weekday are used
+CALENDAR_HOURS = 24 * 36524
+
+# p99 of fewer calls is little more than the slowest of them, so it is not reported
+MIN_P99_CALLS = 50
+# Metrics compared against the baseline: the calls each side needs behind the value
+# for it to be compared, and an absolute floor below which differences are allocator
+# or timer noise and never flagged. Timing differences must also exceed NOISE_SPREADS
+# times the larger spread of the two runs: the median absolute deviation for p50,
+# p99 - p50 for p99.
+COMPARED_METRICS = {'p50_ms': (5, 0.5), 'p99_ms': (MIN_P99_CALLS, 1.0), 'peak_rss_mb': (1, 2.0)}
+NOISE_SPREADS = 3
+DEFAULT_TOLERANCE = 0.2
+
+
+def synthetic_readings(n_rows, seed=0, start='2020-01-01'):
+    """
+    Hourly dam readings with daily and yearly cycles, storms and noise.
+
+    Series longer than CALENDAR_HOURS wrap around to `start` again.
+    """
+    rng = np.random.default_rng(seed)
+    t = np.arange(n_rows)
+
+    precipitation = np.maximum(rng.gamma(0.3, 2.0, n_rows) - 0.5, 0)
+    flow_rate = (120 + 15 * np.sin(2 * np.pi * t / (24 * 365))
+                 + 5 * np.sin(2 * np.pi * t / 24)
+                 + 8 * np.convolve(precipitation, np.ones(12) / 12, mode='same')
+                 + rng.normal(0, 2, n_rows))
+    release_rate = 0.7 * flow_rate + rng.normal(0, 1.5, n_rows)
+
+    # Level drifts with the inflow/release balance, kept inside the reservoir range
+    level = 45 + np.cumsum((flow_rate - release_rate - 36) * 0.002 + rng.normal(0, 0.05, n_rows))
+    level = 30 + np.abs((level - 30) % 60 - 30)
+
+    return pd.DataFrame({
+        'timestamp': pd.Timestamp(start) + pd.to_timedelta(t % CALENDAR_HOURS, unit='h'),
+        'waterLevel': level.round(2),
+        'flowRate': flow_rate.round(2),
+        'releaseRate': release_rate.round(2),
+        'precipitation': precipitation.round(2),
+    })
+
+
+def _current_rss():
+    with open('/proc/self/statm') as f:
+        return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+
+
+def _peak_rss_child(fn, conn):
+    import resource
+    try:
+        baseline = _current_rss()
+        fn()
+        # ru_maxrss is in KB on Linux
+        conn.send((resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024 - baseline) / 2**20)
+    except Exception:
+        conn.send(None)
+
+
+def peak_rss_mb(fn):
+    """
+    Peak resident memory a call of fn adds, in MB, measured in a forked child.
+
+    Unlike tracemalloc this includes native allocations such as numpy
+    buffers and sklearn's tree building. The child starts from a copy of the
+    current process, so fn sees the same state but its side effects are
+    discarded. Returns None where fork or /proc are unavailable.
+    """
+    if not os.path.exists('/proc/self/statm') or 'fork' not in multiprocessing.get_all_start_methods():
+        return None
+    context = multiprocessing.get_context('fork')
+    receiver, sender = context.Pipe(duplex=False)
+    gc.collect()
+    child = context.Process(target=_peak_rss_child, args=(fn, sender))
+    child.start()
+    sender.close()
+    try:
+        return receiver.recv()
+    except EOFError:
+        # The child died, e.g. killed for running out of memory
+        return None
+    finally:
+        child.join()
+
+
+def measure(fn, repeats=1, memory=True):
+    """
+    Time `repeats` calls of fn and, separately, measure the peak resident
+    memory of one more call in a forked child (see peak_rss_mb). p99 is only
+    reported for at least MIN_P99_CALLS calls; mad_ms is the median absolute
+    deviation of the call times.
+
+    Returns (stats dict, result of the last timed call).
+    """
+    samples = []
+    result = None
+    for _ in range(repeats):
+        # Drop the previous result first so it does not count towards the next call
+        result = None
+        gc.collect()
+        start = time.perf_counter()
+        result = fn()
+        samples.append(time.perf_counter() - start)
+
+    samples = np.array(samples) * 1000
+    median = np.median(samples)
+    stats = {
+        'calls': repeats,
+        'wall_seconds': float(samples.sum() / 1000),
+        'p50_ms': float(median),
+        'mad_ms': float(np.median(np.abs(samples - median))),
+    }
+    if repeats >= MIN_P99_CALLS:
+        stats['p99_ms'] = float(np.percentile(samples, 99))
+
+    if memory:
+        stats['peak_rss_mb'] = peak_rss_mb(fn)
+
+    return stats, result
+
+
+def repeats_for(n_rows, small, large):
+    return small if n_rows <= 100000 else large
+
+
+def benchmark_size(n_rows, max_train_rows, predict_repeats=50, seed=0):
+    """Benchmark every stage on `n_rows` synthetic readings."""
+    readings = synthetic_readings(n_rows, seed)
+    model = DamWaterPredictionModel()
+    results = {}
+
+    results['preprocess_data'], df = measure(
+        lambda: model.preprocess_data(readings), repeats_for(n_rows, 10, 1))
+    results['create_features_targets'], _ = measure(
+        lambda: model.create_features_targets(df.copy()), repeats_for(n_rows, 10, 1))
+    del df
+    results['feature_matrix'], _ = measure(
+        lambda: model.feature_matrix(readings), repeats_for(n_rows, 10, 1))
+
+    if n_rows > max_train_rows:
+        results['train'] = {'skipped': f'rows > max_train_rows ({max_train_rows})'}
+        # Later stages only need a fitted model; train it on the largest allowed prefix
+        model.train(readings.iloc[:max_train_rows])
+    else:
+        results['train'], _ = measure(lambda: model.train(readings))
+
+    current = readings.iloc[-1]
+    payload = {
+        'historicalData': readings.iloc[-48:-1].assign(
+            timestamp=lambda frame: frame['timestamp'].dt.strftime('%Y-%m-%dT%H:%M:%S')).to_dict('records'),
+        'currentLevel': float(current['waterLevel']),
+        'flowRate': float(current['flowRate']),
+        'precipitation': float(current['precipitation']),
+    }
+    results['predict_future_levels'], predictions = measure(
+        lambda: model.predict_future_levels(payload), predict_repeats)
+
+    level = payload['currentLevel']
+    dam_info = {'currentLevel': level, 'safetyThreshold': level * 1.1, 'criticalLevel': level * 1.2}
+    results['generate_recommendations'], _ = measure(
+        lambda: model.generate_recommendations(predictions, dam_info), predict_repeats * 4)
+
+    return results
+
+
+def run(sizes, max_train_rows=DEFAULT_MAX_TRAIN_ROWS, predict_repeats=50):
+    report = {
+        'meta': {
+            'timestamp': datetime.now().isoformat(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'numpy': np.__version__,
+            'pandas': pd.__version__,
+            'sklearn': sklearn.__version__,
+            'sizes': sizes,
+            'max_train_rows': max_train_rows,
+        },
+        'results': {},
+    }
+    for n_rows in sizes:
+        print(f"Benchmarking {n_rows} rows...", file=sys.stderr)
+        for stage, stats in benchmark_size(n_rows, max_train_rows, predict_repeats).items():
+            report['results'][f'{stage}@{n_rows}'] = stats
+    return report
+
+
+def compare(report, baseline, tolerance=DEFAULT_TOLERANCE):
+    """
+    Compare a report with a baseline report.
+
+    Returns one entry per (case, metric) present in both and backed by
+    enough calls on both sides, with the ratio new/baseline and whether it
+    exceeds 1 + tolerance and the difference exceeds the metric's noise
+    floor (see COMPARED_METRICS).
+    """
+    rows = []
+    for case, stats in report['results'].items():
+        base = baseline['results'].get(case)
+        if not base:
+            continue
+        for metric, (min_calls, floor) in COMPARED_METRICS.items():
+            if metric not in stats or metric not in base or not base[metric]:
+                continue
+            if min(stats.get('calls', 0), base.get('calls', 0)) < min_calls:
+                continue
+            if metric == 'p50_ms':
+                floor = max(floor, NOISE_SPREADS * max(stats.get('mad_ms', 0), base.get('mad_ms', 0)))
+            elif metric == 'p99_ms':
+                floor = max(floor, NOISE_SPREADS * max(stats['p99_ms'] - stats['p50_ms'],
+                                                       base['p99_ms'] - base['p50_ms']))
+            ratio = stats[metric] / base[metric]
+            regression = ratio > 1 + tolerance and stats[metric] - base[metric] > floor
+            rows.append({
+                'case': case,
+                'metric': metric,
+                'baseline': base[metric],
+                'current': stats[metric],
+                'ratio': ratio,
+                'regression': regression,
+            })
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark DamWaterPredictionModel training and inference.")
+    parser.add_argument('--sizes', default=','.join(str(n) for n in DEFAULT_SIZES),
+                        help="Comma-separated row counts (default: %(default)s)")
+    parser.add_argument('--max-train-rows', type=int, default=DEFAULT_MAX_TRAIN_ROWS,
+                        help="Skip timing train() above this many rows (default: %(default)s)")
+    parser.add_argument('--predict-repeats', type=int, default=50,
+                        help="Calls per latency measurement (default: %(default)s)")
+    parser.add_argument('--output', help="Write the JSON report here instead of stdout")
+    parser.add_argument('--baseline', help="Previous JSON report to compare against")
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE,
+                        help="Relative slowdown counted as a regression (default: %(default)s)")
+    args = parser.parse_args(argv)
+
+    warnings.filterwarnings('ignore', category=FutureWarning)
+    sizes = [int(size) for size in args.sizes.split(',')]
+    report = run(sizes, args.max_train_rows, args.predict_repeats)
+
+    regressions = []
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        report['comparison'] = compare(report, baseline, args.tolerance)
+        regressions = [row for row in report['comparison'] if row['regression']]
+        for row in report['comparison']:
+            flag = 'REGRESSION' if row['regression'] else ''
+            print(f"{row['case']:<36} {row['metric']:<8} {row['baseline']:>12.3f} {row['current']:>12.3f} "
+                  f"{row['ratio']:>7.2f}x {flag}", file=sys.stderr)
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text)
+    else:
+        print(text)
+
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
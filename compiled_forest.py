@@ -0,0 +1,22 @@
+# The single implementation is in Electricity_Bill_Predictor/compiled_forest.py,
+# next to the app that is deployed on its own; the dam model imports it from here.
+from Electricity_Bill_Predictor.compiled_forest import CompiledForest, compare_latency
+
+
+if __name__ == '__main__':
+    import json
+
+    from dam_water_prediction_model import DamWaterPredictionModel
+
+    readings = 'synthetic_dam_readings.json'
+    with open(readings) as f:
+        data = json.load(f)
+
+    dam_model = DamWaterPredictionModel()
+    dam_model.train(data)
+    X, _ = dam_model.create_features_targets(dam_model.preprocess_data(data))
+    X_scaled = dam_model.scaler.transform(X)
+
+    print(f"{'rows':>6} {'sklearn ms':>12} {'compiled ms':>12} {'max abs diff':>14}")
+    for result in compare_latency(dam_model.model, X_scaled):
+        print(f"{result['rows']:>6} {result['sklearn_ms']:>12.3f} {result['compiled_ms']:>12.3f} {result['max_abs_diff']:>14.2e}")
@@ -0,0 +1,379 @@
+import os
+import json
+import re
+import uuid
+import logging
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# Columns every dam reading must have, and how they are stored
+READING_COLUMNS = ['timestamp', 'waterLevel', 'flowRate', 'releaseRate', 'precipitation']
+NUMERIC_COLUMNS = READING_COLUMNS[1:]
+COLUMN_DTYPES = {'timestamp': 'datetime64[ns]', **{column: np.float64 for column in NUMERIC_COLUMNS}}
+
+# Bump when the cache layout changes so stale caches are rebuilt
+CACHE_VERSION = 2
+
+
+class DamReadingsFormatError(ValueError):
+    """The file is not a JSON array or NDJSON stream of readings."""
+
+
+_SEPARATORS = re.compile(r'[\s,]*')
+_WHITESPACE = re.compile(r'\s*')
+
+
+class _ColumnBuffers:
+    """Typed, amortized-growth numpy buffers, one per reading column."""
+
+    def __init__(self, capacity):
+        self.size = 0
+        self.arrays = {column: np.empty(capacity, dtype) for column, dtype in COLUMN_DTYPES.items()}
+
+    def append(self, columns, n):
+        if self.size + n > len(self.arrays['timestamp']):
+            capacity = max(self.size + n, 2 * len(self.arrays['timestamp']))
+            for column, array in self.arrays.items():
+                grown = np.empty(capacity, array.dtype)
+                grown[:self.size] = array[:self.size]
+                self.arrays[column] = grown
+        for column, values in columns.items():
+            self.arrays[column][self.size:self.size + n] = values
+        self.size += n
+
+    def finish(self):
+        for array in self.arrays.values():
+            array.resize(self.size, refcheck=False)
+        return self.arrays
+
+
+def _decode_lines(lines, first_line):
+    """Decode NDJSON lines one at a time, reporting the ones that fail."""
+    records, errors = [], []
+    for offset, line in enumerate(lines):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            records.append(json.loads(line))
+        except json.JSONDecodeError as err:
+            errors.append({'line': first_line + offset, 'error': str(err)})
+    return records, errors
+
+
+def _iter_ndjson(f, block_size):
+    """
+    Yield (records, errors) for successive blocks of NDJSON lines.
+
+    Each block is decoded with a single json.loads call; only blocks that
+    contain a bad line are decoded line by line to locate it.
+    """
+    line = 1
+    while True:
+        lines = f.readlines(block_size)
+        if not lines:
+            return
+        try:
+            records = json.loads('[' + ','.join(l for l in lines if not l.isspace()) + ']')
+            yield records, []
+        except json.JSONDecodeError:
+            yield _decode_lines(lines, line)
+        line += len(lines)
+
+
+def _decode_elements(decoder, window, first_line):
+    """Decode array elements one at a time, skipping to the next object after a bad one."""
+    records, errors = [], []
+    pos, line, counted = 0, first_line, 0
+    while True:
+        pos = _SEPARATORS.match(window, pos).end()
+        if pos >= len(window):
+            return records, errors
+        line += window.count('\n', counted, pos)
+        counted = pos
+        try:
+            record, pos = decoder.raw_decode(window, pos)
+            records.append(record)
+        except json.JSONDecodeError as err:
+            errors.append({'line': line, 'error': err.msg})
+            next_object = window.find('{', pos + 1)
+            pos = next_object if next_object >= 0 else len(window)
+
+
+def _iter_json_array(f, block_size):
+    """
+    Yield (records, errors) for successive windows of a top-level JSON array,
+    reading `block_size` characters at a time.
+
+    Only a window of the file is held in memory. Each window runs up to the
+    last complete object in the buffer (readings are flat objects) and is
+    decoded with a single json.loads call; windows with a malformed element
+    or stray commas are decoded element by element instead.
+    """
+    decoder = json.JSONDecoder()
+    buf = f.read(block_size)
+    eof = not buf
+    pos = _WHITESPACE.match(buf).end() + 1  # past the opening '['
+    line = 1 + buf.count('\n', 0, pos)
+
+    while True:
+        start = _SEPARATORS.match(buf, pos).end()
+        line += buf.count('\n', pos, start)
+        end = buf.rfind('}', start) + 1
+
+        if not eof and (end == 0 or end < len(buf) - block_size // 2):
+            # Not enough of the array buffered yet; drop the consumed part and read on
+            chunk = f.read(block_size)
+            eof = not chunk
+            buf, pos = buf[start:] + chunk, 0
+            continue
+
+        if end == 0:
+            if buf.startswith(']', start):
+                return
+            raise DamReadingsFormatError("Unterminated JSON array")
+
+        window = buf[start:end]
+        try:
+            yield json.loads('[' + window + ']'), []
+        except json.JSONDecodeError:
+            yield _decode_elements(decoder, window, line)
+        line += window.count('\n')
+        pos = end
+
+
+def _chunk_columns(records, first_record, report, max_bad_lines, seen_columns):
+    """
+    Convert a chunk of records to typed column arrays.
+
+    Records with a missing or invalid value, including every record of a
+    chunk that lacks a column altogether, are dropped and reported by their
+    1-based position in the file. None entries stand for records already
+    reported and are dropped silently. Columns present in the chunk are
+    added to `seen_columns`.
+    """
+    skipped = np.fromiter((record is None for record in records), dtype=bool, count=len(records))
+    if skipped.any():
+        records = [{} if record is None else record for record in records]
+    seen_columns.update(column for column in READING_COLUMNS
+                        if column not in seen_columns and any(column in record for record in records))
+
+    columns = {}
+    invalid = {}
+    values = [record.get('timestamp') for record in records]
+    try:
+        timestamps = pd.to_datetime(values, format='ISO8601', errors='coerce')
+    except (TypeError, ValueError):
+        timestamps = pd.to_datetime(values, format='ISO8601', errors='coerce', utc=True)
+    if timestamps.tz is not None:
+        timestamps = timestamps.tz_convert(None)
+    columns['timestamp'] = timestamps.to_numpy(dtype='datetime64[ns]')
+    invalid['timestamp'] = np.isnat(columns['timestamp'])
+
+    for column in NUMERIC_COLUMNS:
+        values = [record.get(column) for record in records]
+        try:
+            array = np.array(values, dtype=np.float64)
+        except (TypeError, ValueError):
+            array = pd.to_numeric(pd.Series(values, dtype=object), errors='coerce').to_numpy(dtype=np.float64)
+        columns[column] = array
+        invalid[column] = np.isnan(array)
+
+    bad = np.logical_or.reduce(list(invalid.values())) & ~skipped
+    if bad.any():
+        report['bad_count'] += int(bad.sum())
+        for i in np.flatnonzero(bad)[:max(0, max_bad_lines - len(report['bad_lines']))]:
+            fields = [column for column in READING_COLUMNS if invalid[column][i]]
+            report['bad_lines'].append({'record': first_record + int(i),
+                                        'error': f"missing or invalid {', '.join(fields)}"})
+    if bad.any() or skipped.any():
+        keep = ~(bad | skipped)
+        columns = {column: array[keep] for column, array in columns.items()}
+
+    return columns
+
+
+def read_dam_readings(path, chunk_size=50000, block_size=1 << 20, max_bad_lines=100):
+    """
+    Stream dam readings from a JSON array or newline-delimited JSON file.
+
+    Records are parsed `chunk_size` at a time and written into typed numpy
+    column buffers, so working memory is bounded by the chunk and read block
+    rather than the file size. Lines that fail to parse and records without
+    valid values are skipped and reported (up to `max_bad_lines` of them)
+    without a second pass over the file. A column missing from a stretch of
+    records only invalidates those records; raises ValueError if a required
+    column appears nowhere in the file.
+
+    Returns (DataFrame with READING_COLUMNS, report dict).
+    """
+    report = {'format': None, 'rows': 0, 'chunks': 0, 'bad_count': 0, 'bad_lines': []}
+    buffers = _ColumnBuffers(chunk_size)
+    seen_columns = set()
+
+    with open(path, 'r', encoding='utf-8-sig', errors='ignore') as f:
+        # Peek at the first non-whitespace character to tell the formats apart
+        first = ''
+        while True:
+            char = f.read(1)
+            if not char or not char.isspace():
+                first = char
+                break
+        if not first:
+            raise ValueError("Data file is empty")
+        f.seek(0)
+
+        if first == '[':
+            report['format'] = 'json'
+            batches = _iter_json_array(f, block_size)
+        elif first == '{':
+            report['format'] = 'ndjson'
+            batches = _iter_ndjson(f, block_size)
+        else:
+            raise DamReadingsFormatError(f"Unrecognized dam readings format in {path}")
+
+        chunk, first_record, seen = [], 1, 0
+        for records, errors in batches:
+            for error in errors:
+                report['bad_count'] += 1
+                if len(report['bad_lines']) < max_bad_lines:
+                    report['bad_lines'].append(error)
+
+            for record in records:
+                seen += 1
+                if not isinstance(record, dict):
+                    report['bad_count'] += 1
+                    if len(report['bad_lines']) < max_bad_lines:
+                        report['bad_lines'].append({'record': seen, 'error': 'record is not an object'})
+                    # Keeps later records' positions; _chunk_columns drops it without reporting again
+                    record = None
+                chunk.append(record)
+
+            while len(chunk) >= chunk_size:
+                columns = _chunk_columns(chunk[:chunk_size], first_record, report, max_bad_lines, seen_columns)
+                buffers.append(columns, len(columns['timestamp']))
+                report['chunks'] += 1
+                chunk, first_record = chunk[chunk_size:], first_record + chunk_size
+
+        if chunk:
+            columns = _chunk_columns(chunk, first_record, report, max_bad_lines, seen_columns)
+            buffers.append(columns, len(columns['timestamp']))
+            report['chunks'] += 1
+
+    missing_columns = [column for column in READING_COLUMNS if column not in seen_columns]
+    if seen and missing_columns:
+        raise ValueError(f"Missing required columns: {', '.join(missing_columns)}")
+
+    report['rows'] = buffers.size
+    if report['bad_count']:
+        logger.warning(f"Skipped {report['bad_count']} bad dam readings in {path}")
+
+    return pd.DataFrame(buffers.finish(), copy=False), report
+
+
+def reading_cache_dir(path):
+    """Default cache directory for a readings file: `<path>.cache` next to it."""
+    return f'{path}.cache'
+
+
+def _source_key(path):
+    stat = os.stat(path)
+    return {'version': CACHE_VERSION, 'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+
+
+def _column_path(cache_dir, column, build):
+    # Builds before CACHE_VERSION 2 had no id
+    return os.path.join(cache_dir, f'{column}.{build}.npy' if build else f'{column}.npy')
+
+
+def build_reading_cache(path, cache_dir=None, **read_options):
+    """
+    Convert a readings file into a binary columnar cache.
+
+    Each reading column is written as its own .npy file, named with an id
+    unique to this build, and a meta.json records the source size and mtime
+    the cache was built from and which build to read. meta.json is replaced
+    atomically once every column is written, so concurrent builders never
+    write the same files and a reader never mixes columns from two builds.
+    The build it replaced is then removed; readers that already have it
+    mapped keep it.
+
+    Returns the parse report from read_dam_readings.
+    """
+    cache_dir = cache_dir or reading_cache_dir(path)
+    key = _source_key(path)
+    df, report = read_dam_readings(path, **read_options)
+
+    os.makedirs(cache_dir, exist_ok=True)
+    build = uuid.uuid4().hex
+    for column in READING_COLUMNS:
+        np.save(_column_path(cache_dir, column, build), df[column].to_numpy(dtype=COLUMN_DTYPES[column]))
+
+    meta = {**key, 'build': build, 'rows': len(df), 'bad_count': report['bad_count']}
+    fd, temp_path = tempfile.mkstemp(suffix='.tmp', dir=cache_dir)
+    try:
+        with os.fdopen(fd, 'w') as f:
+            json.dump(meta, f)
+        previous = _read_cache_meta(cache_dir)
+        os.replace(temp_path, os.path.join(cache_dir, 'meta.json'))
+    except BaseException:
+        os.unlink(temp_path)
+        raise
+
+    if previous:
+        for column in READING_COLUMNS:
+            try:
+                os.unlink(_column_path(cache_dir, column, previous.get('build')))
+            except OSError:
+                pass
+
+    return report
+
+
+def _read_cache_meta(cache_dir):
+    try:
+        with open(os.path.join(cache_dir, 'meta.json')) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def load_cached_readings(path, cache_dir=None, mmap_mode='r'):
+    """
+    Load dam readings through the binary cache, rebuilding it first if it is
+    missing or the source file has changed since it was built.
+
+    With `mmap_mode` set the columns are memory-mapped and the DataFrame is
+    built on top of them without copying, so loading takes milliseconds
+    regardless of file size. The default 'r' gives a read-only frame; use
+    'c' for copy-on-write or None to read the arrays into memory.
+
+    Raises OSError if the cache cannot be written (e.g. a read-only data
+    directory). Returns (DataFrame with READING_COLUMNS, rebuilt flag).
+    """
+    cache_dir = cache_dir or reading_cache_dir(path)
+    key = _source_key(path)
+
+    rebuilt = False
+    meta = _read_cache_meta(cache_dir)
+    for _ in range(3):
+        if any(meta.get(field) != value for field, value in key.items()):
+            logger.info(f"Building reading cache for {path} in {cache_dir}")
+            build_reading_cache(path, cache_dir)
+            meta, rebuilt = _read_cache_meta(cache_dir), True
+
+        try:
+            columns = {column: np.load(_column_path(cache_dir, column, meta['build']), mmap_mode=mmap_mode)
+                       for column in READING_COLUMNS}
+            return pd.DataFrame(columns, copy=False), rebuilt
+        except (OSError, KeyError):
+            # A concurrent build replaced this one after meta.json was read: follow
+            # it, or rebuild if meta.json still names the missing files
+            latest = _read_cache_meta(cache_dir)
+            meta = latest if latest.get('build') != meta.get('build') else {}
+
+    raise OSError(f"Reading cache for {path} kept changing while it was loaded")
@@ -1,6 +1,6 @@
 import numpy as np
 import pandas as pd
-from sklearn.model_selection import train_test_split
+from sklearn.model_selection import train_test_split, TimeSeriesSplit, ParameterGrid
 from sklearn.ensemble import RandomForestRegressor
 from sklearn.preprocessing import StandardScaler
 from sklearn.metrics import mean_squared_error, r2_score
@@ -11,6 +11,143 @@ import os
 import logging
 import traceback
 import json
+import time
+import shutil
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from compiled_forest import CompiledForest
+from dam_readings_io import READING_COLUMNS, read_dam_readings, load_cached_readings, DamReadingsFormatError
+
+# Lag offsets (in readings) used by create_features_targets
+LAGS = [1, 3, 6, 12, 24]
+# Reading channels that get lag features, in the order they appear per lag
+LAG_CHANNELS = ['waterLevel', 'flowRate', 'precipitation', 'releaseRate']
+# Channels that get a rate-of-change feature in preprocess_data
+CHANGE_CHANNELS = ['waterLevel', 'flowRate', 'precipitation']
+TIME_FEATURES = ['hour', 'day', 'month', 'day_of_week']
+
+# Default column layout produced by preprocess_data + create_features_targets
+# for readings in the usual timestamp/waterLevel/flowRate/releaseRate/precipitation order
+FEATURE_COLUMNS = (
+    ['waterLevel', 'flowRate', 'releaseRate', 'precipitation']
+    + TIME_FEATURES
+    + [f'{channel}_change' for channel in CHANGE_CHANNELS]
+    + [f'{channel}_lag_{lag}' for lag in LAGS for channel in LAG_CHANNELS]
+)
+
+# Forecast horizons (hours) for direct multi-horizon mode: every 3h up to 7 days
+DEFAULT_HORIZONS = list(range(3, 7 * 24 + 1, 3))
+
+# Up to this many rows the flat-array evaluator beats sklearn's predict
+COMPILED_MAX_ROWS = 256
+
+# Target horizon (readings ahead) of the recursive model fitted by train()
+TRAINING_HORIZON = 24
+
+# Uncertainty band reported by predict_future_levels(..., quantiles=QUANTILES)
+QUANTILES = (0.1, 0.5, 0.9)
+
+# Position of releaseRate in ForecastState readings
+RELEASE_CHANNEL = LAG_CHANNELS.index('releaseRate')
+
+# Approximate memory per row used to size train_out_of_core from a budget:
+# feature building on a chunk (raw columns and the float32 matrix), one
+# stored sample row (float32 features and target), and tree nodes per
+# bootstrapped sample row and estimator with min_samples_leaf=1
+CHUNK_ROW_BYTES = 500
+SAMPLE_ROW_BYTES = 4 * len(FEATURE_COLUMNS) + 8
+TREE_ROW_BYTES = 80
+
+# Default search space for DamWaterPredictionModel.tune
+TUNING_GRID = {
+    'n_estimators': [50, 100, 200],
+    'max_depth': [None, 16],
+    'min_samples_leaf': [1, 4],
+    'max_features': [1.0, 0.5],
+}
+
+
+class ForecastState:
+    """
+    Rolling state for autoregressive forecasting of one or more dams.
+
+    Keeps the most recent readings of each series in a fixed-size numpy ring
+    buffer and writes the model's feature rows for the current step in place,
+    so each reading pushed is O(1) per series and uses the real lag history
+    instead of rebuilding a DataFrame. All series advance in lockstep, which
+    lets a batch of dams share a single model.predict call per step.
+    """
+
+    def __init__(self, n_series=1, feature_columns=None, history_size=max(LAGS)):
+        self.columns = list(feature_columns if feature_columns is not None else FEATURE_COLUMNS)
+        index = {name: i for i, name in enumerate(self.columns)}
+
+        # Current reading plus `history_size` previous ones, per series
+        self.n_series = n_series
+        self.size = history_size + 1
+        self.buffer = np.zeros((n_series, self.size, len(LAG_CHANNELS)))
+        self.head = -1
+
+        # Feature rows for the current step, rewritten in place
+        self.features = np.zeros((n_series, len(self.columns)))
+
+        # Column positions, resolved once
+        self._raw_idx = np.array([index[c] for c in LAG_CHANNELS])
+        self._time_idx = np.array([index[c] for c in TIME_FEATURES])
+        self._change_idx = np.array([index[f'{c}_change'] for c in CHANGE_CHANNELS])
+        self._change_channels = np.array([LAG_CHANNELS.index(c) for c in CHANGE_CHANNELS])
+        self._lag_idx = np.array([[index[f'{c}_lag_{lag}'] for c in LAG_CHANNELS] for lag in LAGS])
+        self._lags = np.array(LAGS)
+
+    @classmethod
+    def from_frames(cls, frames, feature_columns=None, history_size=max(LAGS)):
+        """Seed one series per readings DataFrame (or list of readings) from its tail."""
+        state = cls(len(frames), feature_columns, history_size)
+        for i, df in enumerate(frames):
+            df = pd.DataFrame(df[-state.size:]) if isinstance(df, list) else df
+            history = df[LAG_CHANNELS].to_numpy(dtype=float)[-state.size:]
+
+            # Pad missing history with the oldest reading, like bfill does in training
+            if len(history) < state.size:
+                padding = np.repeat(history[:1], state.size - len(history), axis=0)
+                history = np.vstack([padding, history])
+
+            state.buffer[i] = history
+
+        state.head = state.size - 1
+        return state
+
+    @classmethod
+    def from_frame(cls, df, feature_columns=None, history_size=max(LAGS)):
+        """Seed a single-series state from a readings DataFrame."""
+        return cls.from_frames([df], feature_columns, history_size)
+
+    def push(self, readings):
+        """
+        Append one reading per series, overwriting the oldest.
+
+        `readings` has shape (n_series, 4) in LAG_CHANNELS order.
+        """
+        self.head = (self.head + 1) % self.size
+        self.buffer[:, self.head] = readings
+
+    @property
+    def latest(self):
+        """Most recent readings, shape (n_series, 4) in LAG_CHANNELS order."""
+        return self.buffer[:, self.head]
+
+    def write_features(self, timestamp):
+        """Fill the feature rows for the latest readings at `timestamp`."""
+        f = self.features
+        current = self.buffer[:, self.head]
+        previous = self.buffer[:, (self.head - 1) % self.size]
+
+        f[:, self._raw_idx] = current
+        f[:, self._time_idx] = (timestamp.hour, timestamp.day, timestamp.month, timestamp.weekday())
+        f[:, self._change_idx] = current[:, self._change_channels] - previous[:, self._change_channels]
+        f[:, self._lag_idx] = self.buffer[:, (self.head - self._lags) % self.size]
+        return f
+
 
 class DamWaterPredictionModel:
     """
@@ -18,13 +155,25 @@ class DamWaterPredictionModel:
     based on historical water data, precipitation, and flow rates.
     """
     
-    def __init__(self, model_path=None):
+    def __init__(self, model_path=None, mmap_mode=None):
         """Initialize the model, optionally loading from a saved model file."""
         self.model = None
         self.scaler = StandardScaler()
+        # 'recursive' steps a single-horizon model; 'direct' predicts all horizons at once
+        self.mode = 'recursive'
+        self.horizons = None
+        # Tail of the training readings, kept as lag/target context for update()
+        self.recent_readings = None
+        # Out-of-sample RMSE recorded when the model was validated (see ModelManager)
+        self.holdout_rmse = None
+        # update() calls so far; seeds the trees each update adds
+        self.updates = 0
+        # Flat-array copy of self.model for low-latency small-batch scoring
+        self._compiled = None
+        self._compiled_model = None
         
         if model_path:
-            self.load_model(model_path)
+            self.load_model(model_path, mmap_mode=mmap_mode)
     
     def preprocess_data(self, data):
         """Preprocess the dam reading data for training or prediction."""
@@ -83,27 +232,103 @@ class DamWaterPredictionModel:
         # Features and target
         X = df.drop(['future_waterLevel'], axis=1)
         y = df['future_waterLevel']
-        
+
         return X, y
-    
+
+    def feature_matrix(self, readings, prediction_horizon=TRAINING_HORIZON, columns=None, dtype=np.float32):
+        """
+        Features and targets for raw readings, written straight into one
+        preallocated array.
+
+        Produces the same values as preprocess_data followed by
+        create_features_targets, but as a single (n, len(columns)) Fortran-
+        ordered matrix of `dtype` filled column by column from the raw
+        reading arrays, with no intermediate DataFrames. `columns` defaults
+        to the layout the model was fitted with. Targets stay float64.
+
+        Returns (X, y).
+        """
+        readings = pd.DataFrame(readings) if isinstance(readings, list) else readings
+        columns = list(columns) if columns is not None else self.feature_columns()
+        index = {name: i for i, name in enumerate(columns)}
+        n = len(readings)
+        X = np.empty((n, len(columns)), dtype=dtype, order='F')
+
+        raw = {channel: readings[channel].to_numpy(dtype=float) for channel in LAG_CHANNELS}
+        for channel, values in raw.items():
+            X[:, index[channel]] = values
+
+        timestamps = pd.DatetimeIndex(pd.to_datetime(readings['timestamp']))
+        X[:, index['hour']] = timestamps.hour
+        X[:, index['day']] = timestamps.day
+        X[:, index['month']] = timestamps.month
+        X[:, index['day_of_week']] = timestamps.dayofweek
+
+        for channel in CHANGE_CHANNELS:
+            column = X[:, index[f'{channel}_change']]
+            column[:1] = 0
+            np.subtract(raw[channel][1:], raw[channel][:-1], out=column[1:], casting='same_kind')
+
+        # Lagged readings; the first rows repeat the oldest reading like bfill
+        for lag in LAGS:
+            for channel in LAG_CHANNELS:
+                column = X[:, index[f'{channel}_lag_{lag}']]
+                if n > lag:
+                    column[:lag] = raw[channel][0]
+                    column[lag:] = raw[channel][:-lag]
+                else:
+                    column[:] = raw[channel]
+
+        levels = raw['waterLevel']
+        if n > prediction_horizon:
+            y = levels[np.minimum(np.arange(n) + prediction_horizon, n - 1)]
+        else:
+            change = np.diff(levels, prepend=levels[:1])
+            y = levels + change * prediction_horizon
+
+        return X, y
+
+    def _fit_scaler(self, X, columns, block_rows=1 << 16):
+        """
+        Fit a fresh scaler on a feature matrix, block by block.
+
+        partial_fit on row blocks keeps sklearn's float64 temporaries to one
+        block instead of a copy of the whole matrix. The column names are
+        recorded as if the scaler had been fitted on a DataFrame, so
+        feature_columns() and saved artifacts keep the usual layout.
+        """
+        self.scaler = StandardScaler()
+        for start in range(0, len(X), block_rows):
+            self.scaler.partial_fit(X[start:start + block_rows])
+        self.scaler.feature_names_in_ = np.asarray(columns, dtype=object)
+
     def train(self, historical_data, test_size=0.2, random_state=42):
-        """Train the water level prediction model using historical dam data."""
-        # Preprocess the data
-        df = self.preprocess_data(historical_data)
-        
-        # Create features and targets
-        X, y = self.create_features_targets(df)
-        
+        """
+        Train the water level prediction model using historical dam data.
+
+        `historical_data` is a list of readings, a DataFrame, or the path of
+        a readings file, which is loaded through the binary column cache.
+        """
+        historical_data = self._readings(historical_data)
+
+        # Build the float32 features and targets in one preallocated matrix
+        X, y = self.feature_matrix(historical_data, columns=FEATURE_COLUMNS)
+
         # Split the data
         X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=test_size, random_state=random_state)
-        
-        # Scale the features
-        X_train_scaled = self.scaler.fit_transform(X_train)
-        X_test_scaled = self.scaler.transform(X_test)
-        
+        del X
+
+        # Scale the features in place
+        self._fit_scaler(X_train, FEATURE_COLUMNS)
+        X_train_scaled = self.scale_features(X_train, out=X_train)
+        X_test_scaled = self.scale_features(X_test, out=X_test)
+
         # Train the model
         self.model = RandomForestRegressor(n_estimators=100, random_state=random_state)
         self.model.fit(X_train_scaled, y_train)
+        self.mode = 'recursive'
+        self.horizons = None
+        self._remember_recent(historical_data)
         
         # Evaluate
         train_preds = self.model.predict(X_train_scaled)
@@ -115,7 +340,7 @@ class DamWaterPredictionModel:
         
         # Calculate feature importance
         feature_importance = pd.DataFrame({
-            'feature': X.columns,
+            'feature': FEATURE_COLUMNS,
             'importance': self.model.feature_importances_
         }).sort_values('importance', ascending=False)
         
@@ -125,87 +350,619 @@ class DamWaterPredictionModel:
             'r2_score': r2,
             'feature_importance': feature_importance
         }
+
+    def train_out_of_core(self, historical_data, memory_mb=1024, chunk_rows=None, sample_rows=None,
+                          max_samples=None, n_estimators=100, test_size=0.2, random_state=42):
+        """
+        Train the recursive model on histories too long to hold in memory.
+
+        `historical_data` is one history, or a dict of dam id -> history for
+        several dams. A history is a readings file path (memory-mapped through
+        the binary column cache), a DataFrame, or a list of those holding
+        consecutive parts of one series.
+
+        Features are built `chunk_rows` readings at a time, with the previous
+        max(LAGS) readings carried over as lag context and the last
+        TRAINING_HORIZON readings held back until their targets arrive, so
+        they match train() on the full history. The scaler is fitted with
+        partial_fit in the same pass, and the forest is trained on a sample
+        of `sample_rows` rows drawn from every chunk in proportion to its
+        length (stratified in time). `max_samples` bootstraps each tree from
+        a part of that sample.
+
+        Unless given, `chunk_rows` and `sample_rows` are derived from
+        `memory_mb`, which bounds peak memory independently of history length.
+        """
+        histories = historical_data if isinstance(historical_data, dict) else {None: historical_data}
+        histories = {dam: _history_frames(history) for dam, history in histories.items()}
+        total_rows = sum(len(frame) for frames in histories.values() for frame in frames)
+        if not total_rows:
+            raise ValueError("No readings to train on.")
+
+        budget = memory_mb * 2**20
+        if sample_rows is None:
+            tree_bytes = n_estimators * TREE_ROW_BYTES
+            if isinstance(max_samples, float):
+                tree_bytes *= max_samples
+            elif max_samples is not None:
+                budget -= n_estimators * TREE_ROW_BYTES * max_samples
+                tree_bytes = 0
+            # The train/test split copies the sample while the trees are built
+            sample_rows = int(budget / (2 * SAMPLE_ROW_BYTES + tree_bytes))
+        sample_rows = min(sample_rows, total_rows)
+        if chunk_rows is None:
+            chunk_rows = int((budget - sample_rows * SAMPLE_ROW_BYTES) / CHUNK_ROW_BYTES)
+        if sample_rows <= 0 or chunk_rows <= 0:
+            raise ValueError(f"memory_mb={memory_mb} is too small to train with these settings.")
+
+        rng = np.random.default_rng(random_state)
+        rate = sample_rows / total_rows
+        X_sample = np.empty((sample_rows, len(FEATURE_COLUMNS)), dtype=np.float32)
+        y_sample = np.empty(sample_rows)
+        self.scaler = StandardScaler()
+        emitted = sampled = 0
+        tail = None
+
+        for frames in histories.values():
+            for X, y, tail in _iter_training_chunks(self, frames, chunk_rows):
+                self.scaler.partial_fit(X)
+
+                # Every chunk contributes its share of the sample
+                quota = int((emitted + len(X)) * rate) - int(emitted * rate)
+                rows = np.sort(rng.choice(len(X), quota, replace=False))
+                X_sample[sampled:sampled + quota] = X[rows]
+                y_sample[sampled:sampled + quota] = y[rows]
+                emitted += len(X)
+                sampled += quota
+        self.scaler.feature_names_in_ = np.asarray(FEATURE_COLUMNS, dtype=object)
+
+        X_sample = self.scale_features(X_sample[:sampled], out=X_sample[:sampled])
+        X_train, X_test, y_train, y_test = train_test_split(
+            X_sample, y_sample[:sampled], test_size=test_size, random_state=random_state)
+        del X_sample, y_sample
+
+        self.model = RandomForestRegressor(n_estimators=n_estimators, max_samples=max_samples,
+                                           random_state=random_state)
+        self.model.fit(X_train, y_train)
+        self.mode = 'recursive'
+        self.horizons = None
+        self._remember_recent(tail)
+
+        # Evaluate
+        train_preds = self.model.predict(X_train)
+        test_preds = self.model.predict(X_test)
+
+        feature_importance = pd.DataFrame({
+            'feature': FEATURE_COLUMNS,
+            'importance': self.model.feature_importances_
+        }).sort_values('importance', ascending=False)
+
+        return {
+            'train_rmse': np.sqrt(mean_squared_error(y_train, train_preds)),
+            'test_rmse': np.sqrt(mean_squared_error(y_test, test_preds)),
+            'r2_score': r2_score(y_test, test_preds),
+            'rows': emitted,
+            'sample_rows': sampled,
+            'chunk_rows': chunk_rows,
+            'feature_importance': feature_importance
+        }
+
+    def train_direct(self, historical_data, horizons=None, test_size=0.2, random_state=42):
+        """
+        Train a direct multi-horizon model using historical dam data.
+
+        Builds one target column per horizon (in hours, one reading per hour)
+        from a single pass over the history and fits a multi-output forest, so
+        a full forecast is a single predict call instead of recursive steps.
+        """
+        horizons = list(horizons or DEFAULT_HORIZONS)
+        historical_data = self._readings(historical_data)
+
+        # Build the usual lag features, with one target column per horizon
+        X, _ = self.feature_matrix(historical_data, columns=FEATURE_COLUMNS)
+        y = self._direct_targets(historical_data, horizons)
+
+        # Split the data
+        X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=test_size, random_state=random_state)
+        del X
+
+        # Scale the features in place
+        self._fit_scaler(X_train, FEATURE_COLUMNS)
+        X_train_scaled = self.scale_features(X_train, out=X_train)
+        X_test_scaled = self.scale_features(X_test, out=X_test)
+
+        # Train the model
+        self.model = RandomForestRegressor(n_estimators=100, random_state=random_state)
+        self.model.fit(X_train_scaled, y_train)
+        self.mode = 'direct'
+        self.horizons = horizons
+        self._remember_recent(historical_data)
+
+        # Evaluate
+        train_preds = self.model.predict(X_train_scaled)
+        test_preds = self.model.predict(X_test_scaled)
+
+        train_rmse = np.sqrt(mean_squared_error(y_train, train_preds))
+        test_rmse = np.sqrt(mean_squared_error(y_test, test_preds))
+        r2 = r2_score(y_test, test_preds)
+        horizon_rmse = np.sqrt(((y_test - test_preds) ** 2).mean(axis=0))
+
+        # Calculate feature importance
+        feature_importance = pd.DataFrame({
+            'feature': FEATURE_COLUMNS,
+            'importance': self.model.feature_importances_
+        }).sort_values('importance', ascending=False)
+
+        return {
+            'train_rmse': train_rmse,
+            'test_rmse': test_rmse,
+            'r2_score': r2,
+            'horizon_rmse': dict(zip(horizons, horizon_rmse)),
+            'feature_importance': feature_importance
+        }
     
-    def predict_future_levels(self, current_data, days_ahead=7, hours_per_prediction=3):
-        """Predict future water levels for a specified number of days ahead."""
+    def update(self, new_readings, n_new_trees=10, max_trees=200):
+        """
+        Incrementally update the model with readings that arrived after the
+        data it was trained or last updated on.
+
+        Only the new readings (plus a short tail of earlier ones for lag and
+        target context) are processed, so the cost scales with the new data:
+        `n_new_trees` trees fitted on the new rows are appended through
+        warm_start and the oldest trees are dropped beyond `max_trees`. Rows
+        whose future target is not known yet are held back until the next
+        update.
+
+        The fitted scaler is kept as is. Tree splits do not depend on feature
+        scaling, and refitting it would move existing thresholds relative to
+        the float32 inputs the trees compare against.
+        """
         if not self.model:
             raise ValueError("Model has not been trained yet.")
-            
-        # Get current readings and historical data
-        historical_data = current_data.get('historicalData', [])
-        current_level = current_data.get('currentLevel')
-        flow_rate = current_data.get('flowRate')
-        precipitation = current_data.get('precipitation')
-        
-        # Create a DataFrame for historical data plus current reading
-        current_reading = {
-            'timestamp': datetime.now(),
-            'waterLevel': current_level,
-            'flowRate': flow_rate,
-            'precipitation': precipitation,
-            'releaseRate': historical_data[-1]['releaseRate'] if historical_data else 0
+        if isinstance(self.model, CompiledForest):
+            raise ValueError("Compiled model artifacts cannot be updated; load the full artifact instead.")
+
+        new_readings = pd.DataFrame(new_readings) if isinstance(new_readings, list) else new_readings
+        context = self.recent_readings
+        if context is not None:
+            readings = pd.concat([context, new_readings], ignore_index=True)
+        else:
+            readings = new_readings.reset_index(drop=True)
+        span = self._target_span()
+
+        # Rows that have not been trained on with a real target yet
+        first = max(len(context) - span, 0) if context is not None else 0
+        last = len(readings) - span
+        self._remember_recent(readings)
+        if last <= first:
+            return {'rows': 0, 'n_estimators': len(self.model.estimators_)}
+
+        X, y = self.feature_matrix(readings, prediction_horizon=span)
+        if self.mode == 'direct':
+            y = self._direct_targets(readings, self.horizons)
+        X_new = X[first:last]
+        y_new = y[first:last]
+
+        # Append trees fitted on the new rows only, capping the forest size. Once
+        # the cap is reached the tree count no longer changes, so each update
+        # gets its own random_state; otherwise every update would draw the same
+        # tree seeds and bootstraps. warm_start is only on for this fit, so a
+        # later fit() on the model refits it as usual.
+        self.updates += 1
+        self.model.set_params(warm_start=True, n_estimators=len(self.model.estimators_) + n_new_trees,
+                              random_state=self.updates)
+        try:
+            self.model.fit(self.scale_features(X_new, out=X_new), y_new)
+        finally:
+            self.model.set_params(warm_start=False)
+        if len(self.model.estimators_) > max_trees:
+            self.model.estimators_ = self.model.estimators_[-max_trees:]
+            self.model.n_estimators = max_trees
+        self._compiled_model = None
+
+        return {'rows': len(X_new), 'n_estimators': len(self.model.estimators_)}
+
+    def _readings(self, data):
+        """Readings list or DataFrame as given; a file path is loaded through the cache."""
+        if isinstance(data, (str, os.PathLike)):
+            return load_dam_readings(data, use_cache=True)
+        return data
+
+    def _target_span(self):
+        """How many readings ahead the training targets look."""
+        return max(self.horizons) if self.mode == 'direct' else TRAINING_HORIZON
+
+    def _remember_recent(self, readings):
+        """Keep the readings update() needs for lag features and pending targets."""
+        readings = pd.DataFrame(readings) if isinstance(readings, list) else readings
+        self.recent_readings = readings.iloc[-(max(LAGS) + self._target_span()):].reset_index(drop=True)
+
+    def _direct_targets(self, readings, horizons):
+        """Future water level at every horizon; the tail is forward-filled like train()."""
+        readings = pd.DataFrame(readings) if isinstance(readings, list) else readings
+        levels = readings['waterLevel'].to_numpy(dtype=float)
+        offsets = np.minimum(np.arange(len(levels))[:, None] + np.array(horizons), len(levels) - 1)
+        return levels[offsets]
+
+    def evaluate(self, historical_data):
+        """RMSE of the trained model on a set of readings, using its own training targets."""
+        if not self.model:
+            raise ValueError("Model has not been trained yet.")
+
+        historical_data = self._readings(historical_data)
+        X, y = self.feature_matrix(historical_data)
+        if self.mode == 'direct':
+            y = self._direct_targets(historical_data, self.horizons)
+
+        predictions = self.forest_predict(self.scale_features(X, out=X))
+        return float(np.sqrt(mean_squared_error(y, predictions)))
+
+    def tune(self, historical_data, param_grid=None, mode='recursive', horizons=None, n_splits=5,
+             n_jobs=None, refit=True, random_state=42):
+        """
+        Search forest hyperparameters with rolling-origin time-series folds.
+
+        Every (parameter set, fold) pair is fitted in a process pool. Each fold
+        trains on all readings before its test window, with a gap of one
+        target span so no training target overlaps the test readings. The
+        feature matrix is built once and dumped to a temporary file that the
+        workers memory-map, so it is shared rather than pickled per task.
+
+        With `refit` the best configuration is fitted on all readings and
+        becomes this model. Returns the best parameters, the mean RMSE and
+        per-fold metrics of every configuration.
+        """
+        historical_data = self._readings(historical_data)
+        param_grid = list(ParameterGrid(param_grid or TUNING_GRID))
+        horizons = list(horizons or DEFAULT_HORIZONS) if mode == 'direct' else None
+        span = max(horizons) if mode == 'direct' else TRAINING_HORIZON
+
+        X, y = self.feature_matrix(historical_data, columns=FEATURE_COLUMNS)
+        if mode == 'direct':
+            y = self._direct_targets(historical_data, horizons)
+
+        folds = list(TimeSeriesSplit(n_splits=n_splits, gap=span).split(X))
+        # Largest forests first so the pool does not end on a long straggler
+        tasks = sorted(((i, f) for i in range(len(param_grid)) for f in range(len(folds))),
+                       key=lambda task: -param_grid[task[0]].get('n_estimators', 100))
+
+        shared_dir = tempfile.mkdtemp(prefix='dam_tune_')
+        try:
+            shared_path = os.path.join(shared_dir, 'features.joblib')
+            joblib.dump({'X': X, 'y': y}, shared_path)
+            with ProcessPoolExecutor(max_workers=n_jobs, initializer=_tune_worker_init,
+                                     initargs=(shared_path,)) as pool:
+                scores = list(pool.map(_tune_fold, [
+                    (param_grid[i], folds[f][0][-1] + 1, folds[f][1][0], folds[f][1][-1] + 1, random_state)
+                    for i, f in tasks
+                ]))
+        finally:
+            shutil.rmtree(shared_dir, ignore_errors=True)
+
+        results = [{'params': params, 'folds': [None] * len(folds)} for params in param_grid]
+        for (i, f), score in zip(tasks, scores):
+            results[i]['folds'][f] = score
+        for result in results:
+            fold_rmse = [score['rmse'] for score in result['folds']]
+            result['mean_rmse'] = float(np.mean(fold_rmse))
+            result['std_rmse'] = float(np.std(fold_rmse))
+        results.sort(key=lambda result: result['mean_rmse'])
+        best = results[0]
+
+        if refit:
+            self._fit_scaler(X, FEATURE_COLUMNS)
+            self.model = RandomForestRegressor(random_state=random_state, **best['params'])
+            self.model.fit(self.scale_features(X, out=X), y)
+            self.mode = mode
+            self.horizons = horizons
+            self._compiled_model = None
+            self._remember_recent(historical_data)
+
+        return {
+            'best_params': best['params'],
+            'best_rmse': best['mean_rmse'],
+            'n_folds': len(folds),
+            'results': results,
         }
-        
-        # Combine historical and current data
-        all_data = historical_data + [current_reading]
-        df = self.preprocess_data(all_data)
-        
-        # Initialize results with the last known state
-        latest_state = df.iloc[-1:].copy()
-        predictions = []
-        
+
+    def predict_future_levels(self, current_data, days_ahead=7, hours_per_prediction=3, timings=None,
+                              quantiles=None):
+        """Predict future water levels for a specified number of days ahead."""
+        return self.predict_future_levels_batch([current_data], days_ahead, hours_per_prediction, timings,
+                                                quantiles)[0]
+
+    def predict_future_levels_batch(self, dams, days_ahead=7, hours_per_prediction=3, timings=None,
+                                    quantiles=None):
+        """
+        Predict future water levels for several dams at once.
+
+        Every dam is advanced in lockstep, so each forecast step makes a single
+        model.predict call on a matrix with one row per dam. Returns one
+        predictions DataFrame per dam, in input order. If a `timings` dict is
+        given, seconds spent in 'preprocess' and 'forecast' are added to it.
+
+        With `quantiles` (e.g. QUANTILES) each frame also gets a
+        `waterLevel_p<q>` column per quantile, taken across the individual
+        trees' predictions (see tree_predictions).
+        """
+        if not self.model:
+            raise ValueError("Model has not been trained yet.")
+
+        # Seed the ring buffer with each dam's recent history plus current reading
+        stage_start = time.perf_counter()
+        frames = [self._readings_with_current(dam) for dam in dams]
+        state = ForecastState.from_frames(frames, self.feature_columns())
+        forecast_start = time.perf_counter()
+
         # Generate predictions for the specified timeframe
         total_predictions = int((days_ahead * 24) / hours_per_prediction)
+        hours_ahead = [(i+1) * hours_per_prediction for i in range(total_predictions)]
         current_time = datetime.now()
-        
-        for i in range(total_predictions):
+
+        if self.mode == 'direct':
+            levels, bands = self._predict_direct(state, current_time, hours_ahead, quantiles)
+        else:
+            levels, bands = self._predict_recursive(state, current_time, hours_ahead, quantiles)
+
+        timestamps = [current_time + timedelta(hours=hours) for hours in hours_ahead]
+
+        predictions = []
+        for j in range(state.n_series):
+            columns = {
+                'timestamp': timestamps,
+                'predicted_waterLevel': levels[:, j],
+                'hours_ahead': hours_ahead
+            }
+            for k, q in enumerate(quantiles or ()):
+                columns[quantile_column(q)] = bands[k, :, j]
+            predictions.append(pd.DataFrame(columns))
+
+        if timings is not None:
+            timings['preprocess'] = timings.get('preprocess', 0.0) + forecast_start - stage_start
+            timings['forecast'] = timings.get('forecast', 0.0) + time.perf_counter() - forecast_start
+        return predictions
+
+    def _predict_recursive(self, state, current_time, hours_ahead, quantiles=None, release=None):
+        """
+        Step the single-horizon model forward, one model call per horizon.
+
+        The forest mean is fed back at every step; quantile bands are the
+        spread of the trees around that path, taken over all steps at once.
+        `release`, shape (n_steps, n_series), overrides the release rate of
+        the latest reading before each step.
+
+        The lag features were trained on hourly readings, so between steps
+        the state is rolled forward one hourly reading at a time, with the
+        level interpolated linearly up to the prediction; lag k then stays k
+        hours back at every step.
+        """
+        # Flow, precipitation and release are held at their latest values
+        readings = state.latest.copy()
+        state_time = current_time
+        levels = np.empty((len(hours_ahead), state.n_series))
+        trees = np.empty((len(hours_ahead), state.n_series, self._compiled_forest().n_trees)) if quantiles else None
+        X_scaled = np.empty_like(state.features)
+        previous_hours = 0
+
+        for i, hours in enumerate(hours_ahead):
+            if release is not None:
+                state.buffer[:, state.head, RELEASE_CHANNEL] = release[i]
+                readings[:, RELEASE_CHANNEL] = release[i]
+
             # Prepare features for prediction
-            X, _ = self.create_features_targets(latest_state, prediction_horizon=1)
-            X_scaled = self.scaler.transform(X)
-            
-            # Make prediction
-            pred_water_level = self.model.predict(X_scaled)[0]
-            
-            # Create timestamp for this prediction
-            pred_time = current_time + timedelta(hours=(i+1) * hours_per_prediction)
-            
-            # Store prediction
-            predictions.append({
-                'timestamp': pred_time,
-                'predicted_waterLevel': pred_water_level,
-                'hours_ahead': (i+1) * hours_per_prediction
+            state.write_features(state_time)
+            self.scale_features(state.features, out=X_scaled)
+
+            # Make predictions for every dam
+            if quantiles:
+                trees[i] = self.tree_predictions(X_scaled)
+                levels[i] = trees[i].mean(axis=1)
+            else:
+                levels[i] = self.forest_predict(X_scaled)
+
+            # Feed the predictions back as the hourly readings up to the next step
+            start_level = state.latest[:, 0].copy()
+            step_hours = max(1, int(round(hours - previous_hours)))
+            for hour in range(1, step_hours + 1):
+                readings[:, 0] = start_level + (levels[i] - start_level) * (hour / step_hours)
+                state.push(readings)
+            previous_hours = hours
+            state_time = current_time + timedelta(hours=hours)
+
+        bands = np.quantile(trees, quantiles, axis=2) if quantiles else None
+        return levels, bands
+
+    def _predict_direct(self, state, current_time, hours_ahead, quantiles=None):
+        """Predict every horizon from the current state with a single model call."""
+        missing = sorted(set(hours_ahead) - set(self.horizons))
+        if missing:
+            raise ValueError(f"Model was not trained for horizons (hours): {missing}")
+
+        state.write_features(current_time)
+        X_scaled = self.scale_features(state.features)
+        columns = [self.horizons.index(hours) for hours in hours_ahead]
+
+        if not quantiles:
+            outputs = self.forest_predict(X_scaled)
+            return outputs.reshape(state.n_series, -1)[:, columns].T, None
+
+        # (n_series, n_trees, n_horizons) -> bands of shape (n_quantiles, n_steps, n_series)
+        trees = self.tree_predictions(X_scaled).reshape(state.n_series, -1, len(self.horizons))[:, :, columns]
+        bands = np.quantile(trees, quantiles, axis=1).transpose(0, 2, 1)
+        return trees.mean(axis=1).T, bands
+
+    def optimize_release(self, current_data, release_schedules, safety_threshold=None, days_ahead=2,
+                         hours_per_prediction=3, quantile=None):
+        """
+        Find the smallest release schedule that keeps the forecast below the
+        safety threshold.
+
+        `release_schedules` has one row per candidate: either a constant rate
+        (shape (n_scenarios,)) or a rate per forecast step (shape
+        (n_scenarios, n_steps)). All candidates are rolled forward together
+        as one batch from the same history, so each step is a single model
+        call over every scenario. The forecast checked is the forest mean, or
+        the given tree `quantile` (e.g. 0.9) for a more cautious choice.
+
+        Returns the chosen schedule (the feasible one with the lowest total
+        release; None if none is feasible), its forecast, and the peak level
+        of every scenario.
+        """
+        if not self.model:
+            raise ValueError("Model has not been trained yet.")
+        if self.mode == 'direct':
+            raise ValueError("Release scenarios need a recursive model; direct models do not see future releases.")
+
+        total_predictions = int((days_ahead * 24) / hours_per_prediction)
+        hours_ahead = [(i+1) * hours_per_prediction for i in range(total_predictions)]
+        schedules = np.asarray(release_schedules, dtype=float)
+        if schedules.ndim == 1:
+            schedules = np.repeat(schedules[:, None], total_predictions, axis=1)
+        if schedules.ndim != 2 or schedules.shape[1] != total_predictions:
+            raise ValueError(f"Release schedules must have one rate per scenario or {total_predictions} per scenario")
+
+        if safety_threshold is None:
+            safety_threshold = current_data.get('safetyThreshold', current_data['currentLevel'] * 1.1)
+
+        # Every scenario starts from the same history
+        frame = self._readings_with_current(current_data)
+        state = ForecastState.from_frames([frame] * len(schedules), self.feature_columns())
+        current_time = datetime.now()
+        quantiles = (quantile,) if quantile is not None else None
+        levels, bands = self._predict_recursive(state, current_time, hours_ahead, quantiles, release=schedules.T)
+
+        checked = bands[0] if quantiles else levels
+        peaks = checked.max(axis=0)
+        totals = schedules.sum(axis=1) * hours_per_prediction
+        feasible = np.flatnonzero(peaks < safety_threshold)
+        best = feasible[np.argmin(totals[feasible])] if len(feasible) else None
+
+        result = {
+            'feasible': best is not None,
+            'scenarios_evaluated': len(schedules),
+            'safety_threshold': safety_threshold,
+            'peak_levels': peaks,
+            'schedule': None,
+            'total_release': None,
+            'forecast': None,
+        }
+        if best is not None:
+            forecast = pd.DataFrame({
+                'timestamp': [current_time + timedelta(hours=hours) for hours in hours_ahead],
+                'predicted_waterLevel': levels[:, best],
+                'hours_ahead': hours_ahead,
+                'releaseRate': schedules[best],
             })
-            
-            # Update the latest state for the next prediction
-            latest_state['waterLevel'] = pred_water_level
-            latest_state['hour'] = pred_time.hour
-            latest_state['day'] = pred_time.day
-            latest_state['month'] = pred_time.month
-            latest_state['day_of_week'] = pred_time.weekday()
-            
-        return pd.DataFrame(predictions)
+            if quantiles:
+                forecast[quantile_column(quantile)] = bands[0][:, best]
+            result.update({
+                'scenario': int(best),
+                'schedule': schedules[best],
+                'total_release': float(totals[best]),
+                'peak_level': float(peaks[best]),
+                'forecast': forecast,
+            })
+        return result
+
+    def forest_predict(self, X_scaled):
+        """
+        Score scaled feature rows with the forest.
+
+        Small batches go through a CompiledForest export of the model, which
+        avoids sklearn's per-call overhead; large batches use sklearn directly.
+        Models loaded from a compiled artifact only have the flat arrays.
+        """
+        if isinstance(self.model, CompiledForest):
+            return self.model.predict(X_scaled)
+
+        if len(X_scaled) > COMPILED_MAX_ROWS:
+            return self.model.predict(X_scaled)
+
+        return self._compiled_forest().predict(X_scaled)
+
+    def tree_predictions(self, X_scaled):
+        """
+        Every tree's prediction for scaled feature rows, evaluated together on
+        the flat-array export: shape (n_rows, n_trees), with a trailing
+        n_outputs axis for direct models.
+        """
+        return self._compiled_forest().tree_predictions(X_scaled)
+
+    def _compiled_forest(self):
+        """The model as a CompiledForest, exported lazily from sklearn if needed."""
+        if isinstance(self.model, CompiledForest):
+            return self.model
+
+        # Re-export whenever the underlying model has been replaced
+        if self._compiled_model is not self.model:
+            self._compiled = CompiledForest.from_estimator(self.model)
+            self._compiled_model = self.model
+        return self._compiled
+
+    def _readings_with_current(self, current_data):
+        """
+        Historical readings followed by the current reading from a prediction request.
+
+        `historicalData` may be a list of readings or an already typed DataFrame.
+        Only the last max(LAGS) readings feed a forecast, so only those are kept.
+        """
+        historical_data = current_data.get('historicalData', [])
+        historical_data = historical_data[-max(LAGS):]
+
+        if isinstance(historical_data, pd.DataFrame):
+            release_rate = historical_data['releaseRate'].iloc[-1] if len(historical_data) else 0
+        else:
+            release_rate = historical_data[-1]['releaseRate'] if historical_data else 0
+
+        current_reading = {
+            'timestamp': datetime.now(),
+            'waterLevel': current_data.get('currentLevel'),
+            'flowRate': current_data.get('flowRate'),
+            'precipitation': current_data.get('precipitation'),
+            'releaseRate': release_rate
+        }
+
+        if isinstance(historical_data, pd.DataFrame):
+            current_frame = pd.DataFrame([current_reading], columns=historical_data.columns)
+            return pd.concat([historical_data, current_frame], ignore_index=True)
+        return historical_data + [current_reading]
+
+    def feature_columns(self):
+        """Feature column layout the scaler and model were fitted with."""
+        names = getattr(self.scaler, 'feature_names_in_', None)
+        return list(names) if names is not None else list(FEATURE_COLUMNS)
+
+    def scale_features(self, X, out=None):
+        """Apply the fitted scaler to raw feature arrays without a DataFrame round-trip."""
+        out = np.subtract(X, self.scaler.mean_, out=out)
+        return np.divide(out, self.scaler.scale_, out=out)
     
-    def generate_recommendations(self, predictions, dam_info):
-        """Generate water management recommendations based on predictions."""
+    def generate_recommendations(self, predictions, dam_info, level_column='predicted_waterLevel'):
+        """
+        Generate water management recommendations based on predictions.
+
+        `level_column` selects the forecast the thresholds are checked against,
+        e.g. quantile_column(0.9) to act on the upper end of the uncertainty band.
+        """
         safety_threshold = dam_info.get('safetyThreshold', 0)
         critical_level = dam_info.get('criticalLevel', 0)
         current_level = dam_info.get('currentLevel', 0)
         
         # Check if any predictions exceed thresholds
-        max_predicted = predictions['predicted_waterLevel'].max()
-        min_predicted = predictions['predicted_waterLevel'].min()
+        max_predicted = predictions[level_column].max()
+        min_predicted = predictions[level_column].min()
         
         # When will it reach critical (if it will)
-        will_reach_critical = predictions[predictions['predicted_waterLevel'] >= critical_level]
+        will_reach_critical = predictions[predictions[level_column] >= critical_level]
         time_to_critical = None
         if not will_reach_critical.empty:
-            time_to_critical = will_reach_critical.iloc[0]['hours_ahead']
+            time_to_critical = int(will_reach_critical.iloc[0]['hours_ahead'])
             
         # When will it reach warning level (if it will)
-        will_reach_warning = predictions[predictions['predicted_waterLevel'] >= safety_threshold]
+        will_reach_warning = predictions[predictions[level_column] >= safety_threshold]
         time_to_warning = None
         if not will_reach_warning.empty:
-            time_to_warning = will_reach_warning.iloc[0]['hours_ahead']
+            time_to_warning = int(will_reach_warning.iloc[0]['hours_ahead'])
             
         # Generate recommendations
         recommendations = {
@@ -215,6 +972,8 @@ class DamWaterPredictionModel:
             'max_predicted_level': max_predicted,
             'min_predicted_level': min_predicted,
         }
+        if level_column != 'predicted_waterLevel':
+            recommendations['based_on'] = level_column
         
         # Set current status
         if current_level >= critical_level:
@@ -248,26 +1007,93 @@ class DamWaterPredictionModel:
             
         return recommendations
     
-    def save_model(self, filepath):
-        """Save the trained model to a file."""
+    def save_model(self, filepath, compiled=False):
+        """
+        Save the trained model to a file.
+
+        With `compiled=True` the forest is stored as flat CompiledForest arrays
+        instead of the sklearn object. joblib writes them as uncompressed numpy
+        buffers, so load_model(..., mmap_mode='r') can memory-map them and
+        server workers share the pages instead of each holding a copy.
+        """
         if not self.model:
             raise ValueError("No trained model to save.")
-            
-        model_data = {
-            'model': self.model,
-            'scaler': self.scaler
-        }
+
+        if compiled:
+            forest = self.model if isinstance(self.model, CompiledForest) else CompiledForest.from_estimator(self.model)
+            model_data = {'forest': forest.to_arrays()}
+        else:
+            model_data = {'model': self.model}
+
+        model_data.update({
+            'scaler': self.scaler,
+            'mode': self.mode,
+            'horizons': self.horizons,
+            'recent_readings': self.recent_readings,
+            'holdout_rmse': self.holdout_rmse,
+            'updates': self.updates
+        })
         joblib.dump(model_data, filepath)
         
-    def load_model(self, filepath):
-        """Load a trained model from a file."""
-        model_data = joblib.load(filepath)
-        self.model = model_data['model']
+    def load_model(self, filepath, mmap_mode=None):
+        """
+        Load a trained model from a file.
+
+        `mmap_mode` (e.g. 'r') is passed to joblib.load; for compiled artifacts
+        the forest arrays are then memory-mapped rather than read into memory.
+        """
+        model_data = joblib.load(filepath, mmap_mode=mmap_mode)
+        if 'forest' in model_data:
+            self.model = CompiledForest.from_arrays(model_data['forest'])
+        else:
+            self.model = model_data['model']
         self.scaler = model_data['scaler']
+        self.mode = model_data.get('mode', 'recursive')
+        self.horizons = model_data.get('horizons')
+        self.recent_readings = model_data.get('recent_readings')
+        self.holdout_rmse = model_data.get('holdout_rmse')
+        self.updates = model_data.get('updates', 0)
 
 # Example usage function
-def analyze_dam_data(dam_data_path, save_model_path=None):
-    """Analyze dam data and train a prediction model."""
+def load_dam_readings(dam_data_path, use_cache=False):
+    """
+    Load dam readings from a JSON array or NDJSON file into a DataFrame.
+
+    Readings are streamed into typed column buffers; files the streaming
+    loader cannot make sense of fall back to decoding the whole document.
+    With `use_cache` the columns are served from a memory-mapped binary
+    cache next to the file, built on first use and whenever the file changes.
+    The returned frame is then read-only.
+    """
+    if not os.path.exists(dam_data_path):
+        raise FileNotFoundError(f"Data file not found at {dam_data_path}")
+
+    try:
+        if use_cache:
+            try:
+                df, _ = load_cached_readings(dam_data_path)
+            except OSError as e:
+                # e.g. a read-only data directory; the cache is only an optimization
+                logging.warning(f"Reading cache unavailable ({str(e)}), reading {dam_data_path} directly")
+            else:
+                if df.empty:
+                    raise ValueError("No valid data found in file")
+                return df
+        df, report = read_dam_readings(dam_data_path)
+    except DamReadingsFormatError as e:
+        logging.warning(f"Streaming load failed ({str(e)}), decoding the whole file")
+        return _load_dam_readings_document(dam_data_path)
+
+    for bad_line in report['bad_lines'][:10]:
+        where = f"line {bad_line['line']}" if 'line' in bad_line else f"record {bad_line['record']}"
+        logging.warning(f"Skipped reading at {where}: {bad_line['error']}")
+    if df.empty:
+        raise ValueError("No valid data found in file")
+
+    return df
+
+def _load_dam_readings_document(dam_data_path):
+    """Load dam readings by decoding the whole JSON file at once."""
     try:
         # Try using json module first to handle encoding issues
         import json
@@ -324,6 +1150,203 @@ def analyze_dam_data(dam_data_path, save_model_path=None):
         logging.error(f"Unexpected error loading data: {str(e)}")
         raise
 
+    return df
+
+def _history_frames(history):
+    """Frames with READING_COLUMNS for the consecutive parts of one history; files are memory-mapped."""
+    parts = history if isinstance(history, (list, tuple)) else [history]
+    frames = []
+    for part in parts:
+        if isinstance(part, (str, os.PathLike)):
+            part = load_dam_readings(part, use_cache=True)
+        elif isinstance(part, list):
+            part = pd.DataFrame(part)
+        frames.append(part[READING_COLUMNS])
+    return frames
+
+
+def _iter_training_chunks(model, frames, chunk_rows):
+    """
+    Yield (X, y, tail) for successive chunks of one history, matching
+    create_features_targets on the whole history.
+
+    Each chunk is preprocessed together with the readings carried over from
+    the previous one: max(LAGS) already emitted readings for lag and change
+    context, plus the last TRAINING_HORIZON readings, whose targets lie in
+    the next chunk. `tail` is the carried-over raw readings.
+    """
+    context = max(LAGS) + TRAINING_HORIZON
+    carry, carried_done = None, 0
+
+    pieces = [(frame, start) for frame in frames for start in range(0, len(frame), chunk_rows)]
+    for i, (frame, start) in enumerate(pieces):
+        chunk = frame.iloc[start:start + chunk_rows]
+        buf = chunk if carry is None else pd.concat([carry, chunk])
+        buf = buf.reset_index(drop=True)
+
+        X, y = model.feature_matrix(buf, prediction_horizon=TRAINING_HORIZON, columns=FEATURE_COLUMNS)
+
+        # Rows of buf before `emit` were emitted with the previous chunk; the
+        # final chunk keeps train()'s forward-filled targets at the very end
+        emit = carried_done
+        end = len(buf) if i == len(pieces) - 1 else max(len(buf) - TRAINING_HORIZON, emit)
+        carry_start = min(max(len(buf) - context, 0), end)
+        carry, carried_done = buf.iloc[carry_start:], end - carry_start
+
+        if end > emit:
+            yield X[emit:end], y[emit:end], carry
+
+
+def quantile_column(q):
+    """Predictions column holding quantile `q`, e.g. 0.9 -> 'waterLevel_p90'."""
+    return f'waterLevel_p{q * 100:g}'
+
+def compare_quantile_latency(model, current_data, quantiles=QUANTILES, repeats=20):
+    """
+    Time a point forecast against the same forecast with quantile bands.
+
+    Returns the median latency of each in milliseconds and the relative overhead.
+    """
+    timings = {}
+    for name, q in (('point', None), ('quantiles', quantiles)):
+        samples = []
+        for _ in range(repeats):
+            start = time.perf_counter()
+            model.predict_future_levels(current_data, quantiles=q)
+            samples.append(time.perf_counter() - start)
+        timings[name] = float(np.median(samples) * 1000)
+
+    return {
+        'point_ms': timings['point'],
+        'quantiles_ms': timings['quantiles'],
+        'overhead': timings['quantiles'] / timings['point'] - 1,
+    }
+
+def compare_feature_pipeline(readings, repeats=3):
+    """
+    Measure the DataFrame feature pipeline against feature_matrix.
+
+    Both build and scale the training features for `readings`: the old way
+    through preprocess_data, create_features_targets and a float64
+    StandardScaler copy, the new way as one float32 matrix scaled in place.
+    Returns the median seconds and the traced peak memory (MB) of each.
+    """
+    import tracemalloc
+
+    def dataframe_pipeline():
+        model = DamWaterPredictionModel()
+        X, y = model.create_features_targets(model.preprocess_data(readings))
+        return model.scaler.fit_transform(X), y
+
+    def matrix_pipeline():
+        model = DamWaterPredictionModel()
+        X, y = model.feature_matrix(readings, columns=FEATURE_COLUMNS)
+        model._fit_scaler(X, FEATURE_COLUMNS)
+        return model.scale_features(X, out=X), y
+
+    results = {}
+    for name, pipeline in (('dataframe', dataframe_pipeline), ('matrix', matrix_pipeline)):
+        samples = []
+        for _ in range(repeats):
+            start = time.perf_counter()
+            pipeline()
+            samples.append(time.perf_counter() - start)
+
+        tracemalloc.start()
+        try:
+            pipeline()
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+        results[name] = {'seconds': float(np.median(samples)), 'peak_mb': peak / 2**20}
+
+    results['speedup'] = results['dataframe']['seconds'] / results['matrix']['seconds']
+    results['memory_ratio'] = results['dataframe']['peak_mb'] / results['matrix']['peak_mb']
+    return results
+
+# Feature matrix shared with tuning workers, memory-mapped once per process
+_tune_data = None
+
+
+def _tune_worker_init(shared_path):
+    global _tune_data
+    _tune_data = joblib.load(shared_path, mmap_mode='r')
+
+
+def _tune_fold(task):
+    """Fit one parameter set on one time-series fold and score its test window."""
+    params, train_end, test_start, test_end, random_state = task
+    X, y = _tune_data['X'], _tune_data['y']
+
+    scaler = StandardScaler()
+    X_train = scaler.fit_transform(X[:train_end])
+    X_test = scaler.transform(X[test_start:test_end])
+
+    model = RandomForestRegressor(random_state=random_state, **params)
+    fit_start = time.perf_counter()
+    model.fit(X_train, y[:train_end])
+    fit_seconds = time.perf_counter() - fit_start
+
+    predictions = model.predict(X_test)
+    y_test = y[test_start:test_end]
+    return {
+        'train_rows': int(train_end),
+        'test_rows': int(test_end - test_start),
+        'rmse': float(np.sqrt(mean_squared_error(y_test, predictions))),
+        'r2_score': float(r2_score(y_test, predictions)),
+        'fit_seconds': fit_seconds,
+    }
+
+def compare_update_cost(readings, initial_fraction=0.5, batches=5, n_new_trees=10, max_trees=200):
+    """
+    Benchmark incremental update() against retraining from scratch.
+
+    Trains on the first `initial_fraction` of the readings, then feeds the
+    rest in `batches` chunks. For every chunk, times update() on the
+    incrementally maintained model and a full train() on all readings seen
+    so far, and scores both on the following chunk.
+    """
+    readings = pd.DataFrame(readings) if isinstance(readings, list) else readings.reset_index(drop=True)
+    start = int(len(readings) * initial_fraction)
+    bounds = np.linspace(start, len(readings), batches + 2).astype(int)
+
+    incremental = DamWaterPredictionModel()
+    incremental.train(readings.iloc[:start])
+    results = []
+
+    for lo, hi, next_hi in zip(bounds[:-2], bounds[1:-1], bounds[2:]):
+        update_start = time.perf_counter()
+        incremental.update(readings.iloc[lo:hi], n_new_trees=n_new_trees, max_trees=max_trees)
+        update_seconds = time.perf_counter() - update_start
+
+        retrained = DamWaterPredictionModel()
+        retrain_start = time.perf_counter()
+        retrained.train(readings.iloc[:hi])
+        retrain_seconds = time.perf_counter() - retrain_start
+
+        following = readings.iloc[hi:next_hi]
+        results.append({
+            'seen_rows': int(hi),
+            'new_rows': int(hi - lo),
+            'update_seconds': update_seconds,
+            'retrain_seconds': retrain_seconds,
+            'update_rmse': incremental.evaluate(following),
+            'retrain_rmse': retrained.evaluate(following),
+        })
+
+    return results
+
+def analyze_dam_data(dam_data_path, save_model_path=None, mode='recursive', use_cache=True, tune=False):
+    """
+    Analyze dam data and train a prediction model.
+
+    `mode` selects 'recursive' (train) or 'direct' multi-horizon (train_direct) training.
+    `use_cache` loads the readings through the binary column cache (see load_dam_readings).
+    `tune` picks the forest parameters by time-series cross-validation (see
+    DamWaterPredictionModel.tune) instead of training with the defaults.
+    """
+    df = load_dam_readings(dam_data_path, use_cache=use_cache)
+
     try:
         # Validate required columns
         required_columns = ['timestamp', 'waterLevel', 'flowRate', 'releaseRate', 'precipitation']
@@ -334,12 +1357,21 @@ def analyze_dam_data(dam_data_path, save_model_path=None):
         # Initialize and train model
         model = DamWaterPredictionModel()
         logging.info(f"Training model with loaded data ({len(df)} records)...")
-        training_metrics = model.train(df)
+        if tune:
+            tuning = model.tune(df, mode=mode)
+            logging.info("Model Tuning Complete")
+            print(f"Best parameters: {tuning['best_params']}")
+            print(f"Cross-validated RMSE: {tuning['best_rmse']:.4f} over {tuning['n_folds']} folds")
+        else:
+            if mode == 'direct':
+                training_metrics = model.train_direct(df)
+            else:
+                training_metrics = model.train(df)
 
-        logging.info("Model Training Complete")
-        print(f"Training RMSE: {training_metrics['train_rmse']:.4f}")
-        print(f"Test RMSE: {training_metrics['test_rmse']:.4f}")
-        print(f"R² Score: {training_metrics['r2_score']:.4f}")
+            logging.info("Model Training Complete")
+            print(f"Training RMSE: {training_metrics['train_rmse']:.4f}")
+            print(f"Test RMSE: {training_metrics['test_rmse']:.4f}")
+            print(f"R² Score: {training_metrics['r2_score']:.4f}")
 
         if save_model_path:
             model.save_model(save_model_path)
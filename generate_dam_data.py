@@ -0,0 +1,197 @@
+import os
+import json
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+from scipy.signal import lfilter
+
+# Hours generated before a dam's first chunk and thrown away, so the storage
+# dynamics are settled when it starts; later chunks continue from the previous one
+BURN_IN_HOURS = 14 * 24
+
+# Reading columns written by write_dam_dataset, in file order
+OUTPUT_COLUMNS = ['damId', 'timestamp', 'waterLevel', 'flowRate', 'releaseRate', 'precipitation']
+
+
+def dam_parameters(dam, seed=0):
+    """Physical character of one dam, fixed by (seed, dam)."""
+    rng = np.random.default_rng([seed, dam])
+    return {
+        'base_level': rng.uniform(35, 55),
+        'level_range': rng.uniform(8, 20),
+        'base_inflow': rng.uniform(60, 200),
+        'snowmelt': rng.uniform(0, 0.4),
+        'storm_rate': rng.uniform(0.005, 0.02),
+        'release_fraction': rng.uniform(0.6, 0.8),
+    }
+
+
+def _convolve_carry(x, kernel, tail):
+    """
+    Causal convolution of x with kernel, plus the tail carried over from the
+    previous chunk. Returns (values for x's hours, tail for the next chunk).
+    """
+    full = np.convolve(x, kernel)
+    full[:len(tail)] += tail
+    return full[:len(x)], full[len(x):]
+
+
+def generate_dam_readings(start_date, periods, dam=0, seed=0, offset=0, gap_rate=0.002, null_rate=0.0,
+                          state=None):
+    """
+    Generate `periods` hourly readings for one dam, starting `offset` hours
+    after `start_date`.
+
+    Returns (readings, state). Passing `state` to the call for the next chunk
+    continues the rain, runoff and storage dynamics across the boundary, so
+    consecutive chunks form one continuous series; without it the chunk
+    starts after a BURN_IN_HOURS warm-up. Seasonal and daily patterns depend
+    on the absolute hour, and each (seed, dam, offset) chunk has its own
+    random stream, so a dam's chunks generated in order are fully reproducible.
+    """
+    params = dam_parameters(dam, seed)
+    rng = np.random.default_rng([seed, dam, offset])
+    burn_in = BURN_IN_HOURS if state is None else 0
+    if state is None:
+        state = {'storm': np.zeros(23), 'runoff': np.zeros(95), 'anomaly': np.zeros(1)}
+    n = periods + burn_in
+    t = np.arange(offset - burn_in, offset + periods)
+    day_of_year = (t / 24) % 365.25
+
+    # Rain events: storms start at random and decay over a few hours
+    storm_starts = rng.random(n) < params['storm_rate']
+    intensity = np.where(storm_starts, rng.gamma(2.0, 4.0, n), 0)
+    wet_season = 1 + 0.6 * np.sin(2 * np.pi * (day_of_year - 250) / 365.25)
+    storm_kernel = np.exp(-np.arange(24) / 4.0)
+    precipitation, storm_tail = _convolve_carry(intensity * wet_season, storm_kernel, state['storm'])
+    precipitation += rng.exponential(0.05, n) * (rng.random(n) < 0.05)
+
+    # Seasonal inflow: yearly cycle, spring snowmelt, daily wobble
+    base_inflow = params['base_inflow']
+    seasonal = 0.25 * np.sin(2 * np.pi * (day_of_year - 80) / 365.25)
+    snowmelt = params['snowmelt'] * np.exp(-((day_of_year - 120) ** 2) / (2 * 20 ** 2))
+    daily = 0.03 * np.sin(2 * np.pi * (t % 24) / 24)
+
+    # Catchment response: rain reaches the reservoir spread over ~2 days
+    runoff_kernel = np.exp(-np.arange(96) / 24.0)
+    runoff, runoff_tail = _convolve_carry(precipitation, runoff_kernel / runoff_kernel.sum(), state['runoff'])
+    runoff *= base_inflow * 0.15
+    flow_rate = base_inflow * (1 + seasonal + snowmelt + daily) + runoff + rng.normal(0, base_inflow * 0.02, n)
+    flow_rate = np.maximum(flow_rate, 0)
+
+    # Storage anomaly: AR(1) driven by inflow above normal; releases react to it
+    surplus = (flow_rate - base_inflow) / base_inflow
+    anomaly, anomaly_state = lfilter([0.05], [1, -0.985], surplus + rng.normal(0, 0.05, n), zi=state['anomaly'])
+    water_level = (params['base_level'] + params['level_range'] * np.tanh(anomaly)
+                   + rng.normal(0, 0.05, n))
+
+    # Release follows inflow, and spills more when the reservoir is high
+    release_rate = (params['release_fraction'] * flow_rate
+                    + 0.5 * base_inflow * np.maximum(np.tanh(anomaly), 0)
+                    + rng.normal(0, base_inflow * 0.01, n))
+    release_rate = np.maximum(release_rate, 0)
+
+    df = pd.DataFrame({
+        'damId': f'dam-{dam:04d}',
+        'timestamp': pd.Timestamp(start_date) + pd.to_timedelta(t[burn_in:], unit='h'),
+        'waterLevel': water_level[burn_in:].round(2),
+        'flowRate': flow_rate[burn_in:].round(2),
+        'releaseRate': release_rate[burn_in:].round(2),
+        'precipitation': precipitation[burn_in:].round(2),
+    })
+    state = {'storm': storm_tail, 'runoff': runoff_tail, 'anomaly': anomaly_state}
+
+    # Sensor gaps: outages of a few hours to a day drop readings entirely
+    if gap_rate > 0:
+        outage_starts = np.flatnonzero(rng.random(periods) < gap_rate / 12)
+        outage_ends = outage_starts + rng.integers(1, 25, len(outage_starts))
+        offline = np.zeros(periods + 1, dtype=int)
+        np.add.at(offline, outage_starts, 1)
+        np.add.at(offline, np.minimum(outage_ends, periods), -1)
+        df = df[np.cumsum(offline[:periods]) == 0]
+
+    # Individual missing values
+    if null_rate > 0:
+        for column in ['waterLevel', 'flowRate', 'releaseRate', 'precipitation']:
+            df.loc[rng.random(len(df)) < null_rate, column] = np.nan
+
+    return df.reset_index(drop=True), state
+
+
+def _write_dam(task):
+    """Generate and write one dam's chunk files in order; runs in a worker process."""
+    output_dir, fmt, start_date, periods, chunk_hours, dam, seed, gap_rate, null_rate = task
+    rows = 0
+    state = None
+    for chunk, offset in enumerate(range(0, periods, chunk_hours)):
+        path = os.path.join(output_dir, f'dam-{dam:04d}_{chunk:05d}.{fmt}')
+        df, state = generate_dam_readings(start_date, min(chunk_hours, periods - offset), dam, seed, offset,
+                                          gap_rate, null_rate, state)
+
+        if fmt == 'ndjson':
+            df.to_json(path, orient='records', lines=True, date_format='iso', date_unit='s')
+        else:
+            # Fixed-width strings, so the arrays load without allow_pickle
+            np.savez(path, **{column: df[column].to_numpy(dtype=str if column == 'damId' else None)
+                              for column in OUTPUT_COLUMNS})
+        rows += len(df)
+    return rows
+
+
+def write_dam_dataset(output_dir, n_dams=10, start_date='2020-01-01', periods=24 * 365, chunk_hours=24 * 30,
+                      fmt='ndjson', seed=0, workers=None, gap_rate=0.002, null_rate=0.0):
+    """
+    Write `periods` hourly readings for each of `n_dams` dams to `output_dir`.
+
+    Dams are spread over a process pool. Each worker generates a dam's
+    readings in chunks of `chunk_hours`, in order and carrying the reservoir
+    state from one chunk to the next, and writes each chunk to its own file
+    (dam-0000_00000.ndjson or .npz). Memory stays bounded by chunk size
+    times workers, and the output does not depend on the number of workers.
+    `fmt` is 'ndjson' or 'npz' (one array per column).
+
+    Returns the total number of readings written.
+    """
+    if fmt not in ('ndjson', 'npz'):
+        raise ValueError(f"Unknown output format: {fmt}")
+    os.makedirs(output_dir, exist_ok=True)
+
+    tasks = [(output_dir, fmt, start_date, periods, chunk_hours, dam, seed, gap_rate, null_rate)
+             for dam in range(n_dams)]
+
+    total = 0
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for rows in pool.map(_write_dam, tasks):
+            total += rows
+
+    manifest = {
+        'n_dams': n_dams, 'start_date': str(start_date), 'periods': periods, 'chunk_hours': chunk_hours,
+        'format': fmt, 'seed': seed, 'gap_rate': gap_rate, 'null_rate': null_rate,
+        'files': n_dams * -(-periods // chunk_hours), 'rows': total,
+    }
+    with open(os.path.join(output_dir, 'manifest.json'), 'w') as f:
+        json.dump(manifest, f, indent=2)
+
+    return total
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate synthetic multi-dam hourly readings.")
+    parser.add_argument('output_dir')
+    parser.add_argument('--dams', type=int, default=10)
+    parser.add_argument('--years', type=float, default=1.0)
+    parser.add_argument('--start-date', default='2020-01-01')
+    parser.add_argument('--chunk-days', type=int, default=30)
+    parser.add_argument('--format', choices=['ndjson', 'npz'], default='ndjson')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--gap-rate', type=float, default=0.002)
+    parser.add_argument('--null-rate', type=float, default=0.0)
+    args = parser.parse_args()
+
+    rows = write_dam_dataset(args.output_dir, args.dams, args.start_date, int(args.years * 24 * 365),
+                             args.chunk_days * 24, args.format, args.seed, args.workers,
+                             args.gap_rate, args.null_rate)
+    print(f"Generated {rows} readings for {args.dams} dams in {args.output_dir}")
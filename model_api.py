@@ -1,17 +1,26 @@
-from flask import Flask, request, jsonify
+from flask import Flask, request, jsonify, Response
 from flask_cors import CORS
 import joblib
 import os
-from dam_water_prediction_model import DamWaterPredictionModel
-from datetime import datetime
+from model_manager import ModelManager
+from prediction_cache import PredictionCache
+from api_metrics import MetricsRegistry
+from dam_water_prediction_model import LAGS, QUANTILES, quantile_column
+from datetime import datetime, timedelta
 import logging
 import traceback
 import sys
 import json
+import time
+import hashlib
+import random
+import functools
+import numpy as np
+import pandas as pd
 
 # Configure logging to output to console
 logging.basicConfig(
-    level=logging.DEBUG,
+    level=os.environ.get('LOG_LEVEL', 'INFO').upper(),
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
     handlers=[
         logging.StreamHandler(sys.stdout)
@@ -22,42 +31,276 @@ logger = logging.getLogger(__name__)
 app = Flask(__name__)
 CORS(app)
 
-# Load the trained model
-model = None
+# The served model lives in the manager. DAM_MODEL_PATH may point at a compiled
+# artifact (save_model(..., compiled=True)); its forest arrays are memory-mapped,
+# so workers forked from a preloading parent (e.g. gunicorn --preload) or started
+# separately share the same pages instead of each holding a copy. If there is no
+# artifact yet, training runs in the background and the server starts at once.
+# Retrained models are saved compiled unless DAM_MODEL_COMPILED=0, and every
+# worker reloads the artifact when it changes.
+model_manager = ModelManager(
+    model_path=os.environ.get('DAM_MODEL_PATH', 'dam_model_improved.joblib'),
+    data_path=os.environ.get('DAM_DATA_PATH', 'synthetic_dam_readings.json'),
+    mode=os.environ.get('DAM_MODEL_MODE', 'recursive'),
+    compiled=os.environ.get('DAM_MODEL_COMPILED', '1') != '0'
+)
+# /admin/model starts CPU-heavy jobs; it is disabled unless a token is configured
+ADMIN_TOKEN = os.environ.get('MODEL_ADMIN_TOKEN')
+
+# Repeat requests for the same dam state are answered from an LRU/TTL cache,
+# invalidated whenever a new model version is served
+prediction_cache = PredictionCache(
+    maxsize=int(os.environ.get('PREDICTION_CACHE_SIZE', 1024)),
+    ttl=float(os.environ.get('PREDICTION_CACHE_TTL', 60))
+)
+# Historical readings a forecast actually depends on (the lag window)
+PREDICTION_WINDOW = max(LAGS)
+
+# Default candidates for /optimize/release: constant rates from 0 up to this
+# multiple of the larger of the current release and inflow
+RELEASE_CANDIDATES = 100
+RELEASE_CANDIDATE_MAX_FACTOR = 3.0
+# Longest /optimize/release horizon in days: the horizon /predict forecasts
+RELEASE_MAX_DAYS_AHEAD = 7
+
+# Fraction of request payloads whose excerpt is logged (at DEBUG level only)
+PAYLOAD_LOG_SAMPLE_RATE = float(os.environ.get('PAYLOAD_LOG_SAMPLE_RATE', 0.01))
+
+# Prometheus metrics served on /metrics
+metrics = MetricsRegistry()
+REQUESTS = metrics.counter('dam_api_requests_total', 'Requests handled, by endpoint and status code',
+                           ('endpoint', 'status'))
+IN_FLIGHT = metrics.gauge('dam_api_requests_in_flight', 'Requests currently being handled', ('endpoint',))
+REQUEST_SECONDS = metrics.histogram('dam_api_request_seconds', 'End-to-end request latency', ('endpoint',))
+STAGE_SECONDS = metrics.histogram('dam_api_stage_seconds', 'Latency of each request stage',
+                                  ('endpoint', 'stage'))
+MODEL_LOAD_SECONDS = metrics.gauge('dam_model_load_seconds', 'Time taken to load or train the served model')
+MODEL_VERSION = metrics.gauge('dam_model_version', 'Version of the served model (increments on every swap)')
+CACHE_LOOKUPS = metrics.counter('dam_prediction_cache_lookups_total', 'Prediction cache lookups, by result',
+                                ('result',))
+CACHE_ENTRIES = metrics.gauge('dam_prediction_cache_entries', 'Entries held in the prediction cache')
+
 try:
-    model_path = 'dam_model_improved.joblib'
+    model_path = model_manager.model_path
     logger.info(f"Checking if model file exists at: {os.path.abspath(model_path)}")
     
     if os.path.exists(model_path):
         logger.info(f"Model file found. File size: {os.path.getsize(model_path)} bytes")
         try:
-            model = DamWaterPredictionModel(model_path)
-            logger.info("Model loaded successfully")
+            model_manager.load()
         except Exception as load_err:
             logger.error(f"Failed to load existing model: {str(load_err)}")
             logger.error(traceback.format_exc())
     else:
         logger.error(f"Model file not found at {os.path.abspath(model_path)}")
-        
+
+    if model_manager.model is None:
         # See if we can create a model from the training data
-        logger.info("Attempting to create model from training data...")
-        data_path = 'synthetic_dam_readings.json'
+        data_path = model_manager.data_path
         if os.path.exists(data_path):
-            try:
-                from dam_water_prediction_model import analyze_dam_data
-                logger.info(f"Found training data, creating model from {data_path}...")
-                model = analyze_dam_data(data_path, model_path)
-                logger.info("Created and saved new model")
-            except Exception as train_err:
-                logger.error(f"Failed to create model from training data: {str(train_err)}")
-                logger.error(traceback.format_exc())
+            logger.info(f"Found training data, training model from {data_path} in the background...")
+            model_manager.start('train')
         else:
             logger.error(f"No training data found at {os.path.abspath(data_path)}")
 except Exception as e:
     logger.error(f"Error during model setup: {str(e)}")
     logger.error(traceback.format_exc())
 
+@app.before_request
+def refresh_model():
+    """Pick up a model another worker has saved since this one loaded its own."""
+    model_manager.refresh()
+
+def instrumented(endpoint):
+    """Count, time and track in-flight requests of a view under `endpoint`."""
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            IN_FLIGHT.inc(endpoint=endpoint)
+            start = time.perf_counter()
+            status = 500
+            try:
+                response = app.make_response(view(*args, **kwargs))
+                status = response.status_code
+                return response
+            finally:
+                IN_FLIGHT.dec(endpoint=endpoint)
+                REQUEST_SECONDS.observe(time.perf_counter() - start, endpoint=endpoint)
+                REQUESTS.inc(endpoint=endpoint, status=status)
+        return wrapper
+    return decorator
+
+def observe_stages(endpoint, timings):
+    """Record stage timings collected by the model (see predict_future_levels_batch)."""
+    for stage, seconds in timings.items():
+        STAGE_SECONDS.observe(seconds, endpoint=endpoint, stage=stage)
+
+def log_payload(data):
+    """Log an excerpt of a sampled fraction of payloads, only when DEBUG logging is on."""
+    if logger.isEnabledFor(logging.DEBUG) and random.random() < PAYLOAD_LOG_SAMPLE_RATE:
+        logger.debug(f"Sampled request payload: {json.dumps(data)[:200]}...")
+
+def process_memory():
+    """Memory use of this worker process in MB (RSS, plus PSS/shared where /proc has them)."""
+    memory = {'pid': os.getpid()}
+    try:
+        with open('/proc/self/smaps_rollup') as f:
+            for line in f:
+                key, _, value = line.partition(':')
+                if key in ('Rss', 'Pss', 'Shared_Clean', 'Shared_Dirty'):
+                    memory[f'{key.lower()}_mb'] = int(value.split()[0]) / 1024
+    except OSError:
+        import resource
+        memory['max_rss_mb'] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    return memory
+
+# Fields every historicalData entry carries once validated
+HISTORICAL_FIELDS = ['timestamp', 'waterLevel', 'flowRate', 'releaseRate', 'precipitation']
+
+def historical_columns(entries):
+    """
+    Convert historicalData entries into a typed DataFrame in one pass per field.
+
+    Missing or non-numeric values are found with masks. A missing releaseRate
+    is filled with 70% of flowRate and a missing precipitation with 0; any
+    other missing or invalid value is an error.
+
+    Returns (DataFrame, error message or None).
+    """
+    not_objects = [i for i, entry in enumerate(entries) if not isinstance(entry, dict)]
+    if not_objects:
+        return None, f"Entry {not_objects[0]} must be an object"
+
+    columns = {}
+    for field in HISTORICAL_FIELDS[1:]:
+        values = [entry.get(field) for entry in entries]
+        try:
+            columns[field] = np.array(values, dtype=np.float64)
+        except (TypeError, ValueError):
+            columns[field] = pd.to_numeric(pd.Series(values, dtype=object), errors='coerce').to_numpy(dtype=np.float64)
+
+    timestamps = [entry.get('timestamp') for entry in entries]
+    try:
+        parsed = pd.to_datetime(timestamps, utc=True)
+    except (TypeError, ValueError):
+        parsed = pd.to_datetime(timestamps, utc=True, format='mixed', errors='coerce')
+    columns['timestamp'] = parsed.tz_convert(None).to_numpy(dtype='datetime64[ns]')
+
+    # Values that cannot be auto-fixed
+    invalid = {
+        'timestamp': np.isnat(columns['timestamp']),
+        'waterLevel': np.isnan(columns['waterLevel']),
+        'flowRate': np.isnan(columns['flowRate']),
+    }
+    bad = invalid['timestamp'] | invalid['waterLevel'] | invalid['flowRate']
+    if bad.any():
+        i = int(np.argmax(bad))
+        missing_fields = [field for field in HISTORICAL_FIELDS if field not in entries[i]]
+        if any(field in invalid for field in missing_fields):
+            return None, f"Entry {i} missing fields: {', '.join(missing_fields)}"
+        invalid_fields = [field for field, mask in invalid.items() if mask[i]]
+        return None, f"Entry {i} has invalid values for: {', '.join(invalid_fields)}"
+
+    missing_release = np.isnan(columns['releaseRate'])
+    if missing_release.any():
+        # Auto-calculate releaseRate if missing (70% of flowRate)
+        columns['releaseRate'][missing_release] = columns['flowRate'][missing_release] * 0.7
+        logger.debug(f"Auto-fixed missing releaseRate for {int(missing_release.sum())} entries")
+
+    missing_precipitation = np.isnan(columns['precipitation'])
+    if missing_precipitation.any():
+        # Default precipitation to 0
+        columns['precipitation'][missing_precipitation] = 0
+        logger.debug(f"Auto-fixed missing precipitation for {int(missing_precipitation.sum())} entries")
+
+    return pd.DataFrame({field: columns[field] for field in HISTORICAL_FIELDS}, copy=False), None
+
+def validate_prediction_request(data):
+    """
+    Validate a single-dam prediction payload, auto-fixing what can be fixed.
+
+    On success historicalData is replaced with its typed DataFrame, which the
+    model consumes directly. Returns an error message, or None if the payload
+    is usable.
+    """
+    # Validate required fields
+    required_fields = ['historicalData', 'currentLevel', 'flowRate', 'precipitation']
+    missing_fields = [field for field in required_fields if field not in data]
+    if missing_fields:
+        error_msg = f"Missing required fields: {', '.join(missing_fields)}"
+        logger.error(error_msg)
+        return error_msg
+
+    # Validate historical data format
+    if not isinstance(data['historicalData'], list):
+        logger.error("historicalData is not an array")
+        return 'historicalData must be an array'
+
+    if not data['historicalData']:
+        logger.error("historicalData array is empty")
+        return 'historicalData array is empty'
+
+    # Validate numeric fields
+    numeric_fields = ['currentLevel', 'flowRate', 'precipitation']
+    for field in numeric_fields:
+        if not isinstance(data[field], (int, float)):
+            error_msg = f'{field} must be a numeric value'
+            logger.error(error_msg)
+            return error_msg
+
+    # Validate and type the historical readings
+    historical, error_msg = historical_columns(data['historicalData'])
+    if error_msg:
+        logger.error(error_msg)
+        return error_msg
+    data['historicalData'] = historical
+
+    return None
+
+def dam_info(data):
+    """Current level and thresholds for generate_recommendations, with defaults."""
+    return {
+        'currentLevel': data['currentLevel'],
+        'safetyThreshold': data.get('safetyThreshold', data['currentLevel'] * 1.1),
+        'criticalLevel': data.get('criticalLevel', data['currentLevel'] * 1.2)
+    }
+
+def forecast_options(data):
+    """
+    Quantiles to forecast and the column recommendations act on. With
+    "uncertainty": true a P10/P50/P90 band is returned and recommendations
+    trigger on the upper quantile instead of the mean.
+    """
+    if data.get('uncertainty'):
+        return QUANTILES, quantile_column(QUANTILES[-1])
+    return None, 'predicted_waterLevel'
+
+def prediction_cache_key(version, data):
+    """
+    Hash of everything a /predict response depends on: the model version, the
+    last PREDICTION_WINDOW readings, the current reading, the thresholds and
+    the current hour (time features are hourly).
+    """
+    window = data['historicalData'][HISTORICAL_FIELDS[1:]].to_numpy()[-PREDICTION_WINDOW:].tolist()
+    info = dam_info(data)
+    key = [
+        version,
+        window,
+        [data['currentLevel'], data['flowRate'], data['precipitation']],
+        [info['safetyThreshold'], info['criticalLevel']],
+        bool(data.get('uncertainty')),
+        datetime.now().strftime('%Y-%m-%dT%H'),
+    ]
+    return hashlib.sha1(json.dumps(key, default=str).encode()).hexdigest()
+
+def prediction_records(predictions_df):
+    """Prediction records with timestamps counted from now, so cached forecasts stay current."""
+    now = datetime.now()
+    timestamps = [now + timedelta(hours=int(hours)) for hours in predictions_df['hours_ahead']]
+    return predictions_df.assign(timestamp=timestamps).to_dict('records')
+
 @app.route('/predict', methods=['POST'])
+@instrumented('predict')
 def predict():
     try:
         if not request.is_json:
@@ -65,93 +308,58 @@ def predict():
             return jsonify({'error': 'Content-Type must be application/json'}), 400
 
         try:
-            data = request.get_json()
-            logger.info(f"Received prediction request with data: {json.dumps(data)[:200]}...")
+            with STAGE_SECONDS.time(endpoint='predict', stage='parse'):
+                data = request.get_json()
+            log_payload(data)
         except Exception as json_err:
             logger.error(f"Failed to parse JSON: {str(json_err)}")
             return jsonify({'error': 'Invalid JSON data provided'}), 400
 
-        # Validate required fields
-        required_fields = ['historicalData', 'currentLevel', 'flowRate', 'precipitation']
-        missing_fields = [field for field in required_fields if field not in data]
-        if missing_fields:
-            error_msg = f"Missing required fields: {', '.join(missing_fields)}"
-            logger.error(error_msg)
+        with STAGE_SECONDS.time(endpoint='predict', stage='validate'):
+            error_msg = validate_prediction_request(data)
+        if error_msg:
             return jsonify({'error': error_msg}), 400
 
-        # Validate historical data format
-        if not isinstance(data['historicalData'], list):
-            logger.error("historicalData is not an array")
-            return jsonify({'error': 'historicalData must be an array'}), 400
-
-        if not data['historicalData']:
-            logger.error("historicalData array is empty")
-            return jsonify({'error': 'historicalData array is empty'}), 400
-
-        # Validate required fields in historical data
-        required_hist_fields = ['timestamp', 'waterLevel', 'flowRate', 'releaseRate', 'precipitation']
-        for i, entry in enumerate(data['historicalData']):
-            missing_entry_fields = [field for field in required_hist_fields if field not in entry]
-            if missing_entry_fields:
-                error_msg = f"Entry {i} missing fields: {', '.join(missing_entry_fields)}"
-                logger.error(error_msg)
-                
-                # Try to auto-fix some fields
-                logger.info(f"Attempting to auto-fix missing fields for entry {i}")
-                for field in missing_entry_fields:
-                    if field == 'releaseRate':
-                        # Auto-calculate releaseRate if missing (70% of flowRate)
-                        if 'flowRate' in entry:
-                            entry['releaseRate'] = entry.get('flowRate', 0) * 0.7
-                            logger.info(f"Auto-fixed missing releaseRate for entry {i}")
-                    elif field == 'precipitation':
-                        # Default precipitation to 0
-                        entry['precipitation'] = 0
-                        logger.info(f"Auto-fixed missing precipitation for entry {i}")
-                    else:
-                        return jsonify({'error': error_msg}), 400
-        
-        # Validate numeric fields
-        numeric_fields = ['currentLevel', 'flowRate', 'precipitation']
-        for field in numeric_fields:
-            if not isinstance(data[field], (int, float)):
-                error_msg = f'{field} must be a numeric value'
-                logger.error(error_msg)
-                return jsonify({'error': error_msg}), 400
-
-        # Check if model is loaded
+        # Check if model is loaded; keep this reference for the whole request
+        model, version = model_manager.served
         if model is None:
             logger.error("Model not initialized")
             return jsonify({
                 'error': 'Model not initialized. Please check server logs.'
             }), 500
 
+        prediction_cache.sync(version)
+        cache_key = prediction_cache_key(version, data)
+        cached = prediction_cache.get(cache_key)
+        if cached is not None:
+            predictions_df, recommendations = cached
+            logger.debug("Serving predictions from cache")
+            with STAGE_SECONDS.time(endpoint='predict', stage='serialize'):
+                return jsonify({
+                    'predictions': prediction_records(predictions_df),
+                    'recommendations': recommendations
+                })
+
         try:
             # Make predictions
-            logger.info("Generating predictions...")
-            predictions_df = model.predict_future_levels(data)
-            predictions = predictions_df.to_dict('records')
-            logger.info(f"Generated {len(predictions)} predictions")
+            timings = {}
+            quantiles, level_column = forecast_options(data)
+            predictions_df = model.predict_future_levels(data, timings=timings, quantiles=quantiles)
+            observe_stages('predict', timings)
 
             # Generate recommendations
-            logger.info("Generating recommendations...")
-            recommendations = model.generate_recommendations(
-                predictions_df,
-                {
-                    'currentLevel': data['currentLevel'],
-                    'safetyThreshold': data.get('safetyThreshold', data['currentLevel'] * 1.1),
-                    'criticalLevel': data.get('criticalLevel', data['currentLevel'] * 1.2)
-                }
-            )
-            logger.info("Generated recommendations")
+            with STAGE_SECONDS.time(endpoint='predict', stage='recommendations'):
+                recommendations = model.generate_recommendations(predictions_df, dam_info(data), level_column)
+            prediction_cache.put(cache_key, (predictions_df, recommendations))
 
-            response = {
-                'predictions': predictions,
-                'recommendations': recommendations
-            }
+            with STAGE_SECONDS.time(endpoint='predict', stage='serialize'):
+                response = jsonify({
+                    'predictions': predictions_df.to_dict('records'),
+                    'recommendations': recommendations
+                })
 
-            logger.info("Successfully generated predictions and recommendations")
-            return jsonify(response)
+            logger.debug(f"Generated {len(predictions_df)} predictions and recommendations")
+            return response
 
         except ValueError as ve:
             logger.error(f"Validation error during prediction: {str(ve)}")
@@ -169,31 +377,281 @@ def predict():
         logger.error(traceback.format_exc())
         return jsonify({'error': 'Internal server error'}), 500
 
+@app.route('/predict/batch', methods=['POST'])
+@instrumented('predict_batch')
+def predict_batch():
+    """
+    Predict water levels for many dams in one request.
+
+    Expects {"dams": [<single /predict payload>, ...]}. All valid dams are forecast
+    together with one model call per horizon step; each result carries its own
+    predictions and recommendations (or an error), in input order.
+    """
+    try:
+        if not request.is_json:
+            logger.error("Request is not JSON")
+            return jsonify({'error': 'Content-Type must be application/json'}), 400
+
+        try:
+            with STAGE_SECONDS.time(endpoint='predict_batch', stage='parse'):
+                data = request.get_json()
+            log_payload(data)
+        except Exception as json_err:
+            logger.error(f"Failed to parse JSON: {str(json_err)}")
+            return jsonify({'error': 'Invalid JSON data provided'}), 400
+
+        dams = data.get('dams') if isinstance(data, dict) else None
+        if not isinstance(dams, list) or not dams:
+            logger.error("dams is missing or not a non-empty array")
+            return jsonify({'error': 'dams must be a non-empty array'}), 400
+
+        # Check if model is loaded; keep this reference for the whole request
+        model, version = model_manager.served
+        if model is None:
+            logger.error("Model not initialized")
+            return jsonify({
+                'error': 'Model not initialized. Please check server logs.'
+            }), 500
+        prediction_cache.sync(version)
+
+        results = [None] * len(dams)
+        valid = []
+        cache_keys = {}
+        validate_start = time.perf_counter()
+        for i, dam in enumerate(dams):
+            if not isinstance(dam, dict):
+                results[i] = {'error': 'Each dam must be an object'}
+                continue
+            error_msg = validate_prediction_request(dam)
+            if error_msg:
+                results[i] = {'error': error_msg}
+                continue
+
+            cache_keys[i] = prediction_cache_key(version, dam)
+            cached = prediction_cache.get(cache_keys[i])
+            if cached is not None:
+                predictions_df, recommendations = cached
+                results[i] = {
+                    'predictions': prediction_records(predictions_df),
+                    'recommendations': recommendations
+                }
+            else:
+                valid.append(i)
+        STAGE_SECONDS.observe(time.perf_counter() - validate_start, endpoint='predict_batch', stage='validate')
+
+        if valid:
+            try:
+                logger.debug(f"Generating batch predictions for {len(valid)} dams...")
+                timings = {}
+                # Bands are cheap, so compute them for the whole batch if any dam asks
+                quantiles = QUANTILES if any(dams[i].get('uncertainty') for i in valid) else None
+                batch_predictions = model.predict_future_levels_batch([dams[i] for i in valid], timings=timings,
+                                                                      quantiles=quantiles)
+                observe_stages('predict_batch', timings)
+            except ValueError as ve:
+                logger.error(f"Validation error during batch prediction: {str(ve)}")
+                logger.error(traceback.format_exc())
+                return jsonify({'error': str(ve)}), 400
+            except Exception as e:
+                logger.error(f"Error during batch prediction: {str(e)}")
+                logger.error(traceback.format_exc())
+                return jsonify({
+                    'error': 'Failed to generate predictions. Please check data format.'
+                }), 500
+
+            with STAGE_SECONDS.time(endpoint='predict_batch', stage='recommendations'):
+                for i, predictions_df in zip(valid, batch_predictions):
+                    dam_quantiles, level_column = forecast_options(dams[i])
+                    if quantiles and not dam_quantiles:
+                        predictions_df = predictions_df.drop(columns=[quantile_column(q) for q in quantiles])
+                    recommendations = model.generate_recommendations(predictions_df, dam_info(dams[i]), level_column)
+                    prediction_cache.put(cache_keys[i], (predictions_df, recommendations))
+                    results[i] = {'predictions': predictions_df, 'recommendations': recommendations}
+
+        for dam, result in zip(dams, results):
+            if isinstance(dam, dict) and 'damId' in dam:
+                result['damId'] = dam['damId']
+
+        with STAGE_SECONDS.time(endpoint='predict_batch', stage='serialize'):
+            for i in valid:
+                results[i]['predictions'] = results[i]['predictions'].to_dict('records')
+            response = jsonify({'results': results})
+
+        logger.debug(f"Batch prediction complete: {len(cache_keys)} of {len(dams)} dams succeeded "
+                     f"({len(cache_keys) - len(valid)} from cache)")
+        return response
+
+    except Exception as e:
+        logger.error(f"Unexpected error: {str(e)}")
+        logger.error(traceback.format_exc())
+        return jsonify({'error': 'Internal server error'}), 500
+
+@app.route('/optimize/release', methods=['POST'])
+@instrumented('optimize_release')
+def optimize_release():
+    """
+    Find the smallest release schedule that keeps the forecast below the
+    safety threshold.
+
+    Takes a /predict payload plus optional "releaseSchedules" (constant rates
+    or one rate per 3-hour step for each candidate) and "daysAhead" (default
+    2, at most RELEASE_MAX_DAYS_AHEAD).
+    Without schedules, RELEASE_CANDIDATES constant rates are tried. With
+    "uncertainty": true the P90 forecast must stay below the threshold.
+    """
+    try:
+        if not request.is_json:
+            logger.error("Request is not JSON")
+            return jsonify({'error': 'Content-Type must be application/json'}), 400
+
+        try:
+            with STAGE_SECONDS.time(endpoint='optimize_release', stage='parse'):
+                data = request.get_json()
+            log_payload(data)
+        except Exception as json_err:
+            logger.error(f"Failed to parse JSON: {str(json_err)}")
+            return jsonify({'error': 'Invalid JSON data provided'}), 400
+
+        with STAGE_SECONDS.time(endpoint='optimize_release', stage='validate'):
+            error_msg = validate_prediction_request(data)
+            days_ahead = data.get('daysAhead', 2)
+            if not error_msg and (isinstance(days_ahead, bool) or not isinstance(days_ahead, (int, float))
+                                  or not 0.125 <= days_ahead <= RELEASE_MAX_DAYS_AHEAD):
+                # At least one 3-hour step, at most the /predict horizon
+                error_msg = f'daysAhead must be a number between 0.125 and {RELEASE_MAX_DAYS_AHEAD}'
+                logger.error(error_msg)
+        if error_msg:
+            return jsonify({'error': error_msg}), 400
+
+        model = model_manager.model
+        if model is None:
+            logger.error("Model not initialized")
+            return jsonify({
+                'error': 'Model not initialized. Please check server logs.'
+            }), 500
+
+        schedules = data.get('releaseSchedules')
+        if schedules is None:
+            current_release = float(data['historicalData']['releaseRate'].iloc[-1])
+            upper = max(current_release, float(data['flowRate'])) * RELEASE_CANDIDATE_MAX_FACTOR
+            schedules = np.linspace(0, upper, RELEASE_CANDIDATES)
+
+        try:
+            with STAGE_SECONDS.time(endpoint='optimize_release', stage='forecast'):
+                result = model.optimize_release(
+                    data, schedules,
+                    safety_threshold=dam_info(data)['safetyThreshold'],
+                    days_ahead=days_ahead,
+                    quantile=QUANTILES[-1] if data.get('uncertainty') else None
+                )
+        except ValueError as ve:
+            logger.error(f"Validation error during release optimization: {str(ve)}")
+            return jsonify({'error': str(ve)}), 400
+
+        with STAGE_SECONDS.time(endpoint='optimize_release', stage='serialize'):
+            return jsonify({
+                'feasible': result['feasible'],
+                'scenarios_evaluated': result['scenarios_evaluated'],
+                'safety_threshold': result['safety_threshold'],
+                'schedule': result['schedule'].tolist() if result['feasible'] else None,
+                'total_release': result['total_release'],
+                'peak_level': result.get('peak_level'),
+                'forecast': result['forecast'].to_dict('records') if result['feasible'] else None,
+                'peak_levels': result['peak_levels'].tolist()
+            })
+
+    except Exception as e:
+        logger.error(f"Unexpected error: {str(e)}")
+        logger.error(traceback.format_exc())
+        return jsonify({'error': 'Internal server error'}), 500
+
+def health_status():
+    """Health report shared by the Flask and async servers."""
+    model = model_manager.model
+    status = 'healthy' if model is not None else 'model_not_loaded'
+    model_info = {}
+    
+    if model is not None and hasattr(model, 'model'):
+        model_info['model_type'] = str(type(model.model))
+        model_info['has_scaler'] = hasattr(model, 'scaler')
+        model_info['load_seconds'] = model_manager.load_seconds
+        model_info['version'] = model_manager.version
+        model_info['mode'] = model.mode
+    
+    return {
+        'status': status, 
+        'model_loaded': model is not None,
+        'timestamp': datetime.now().isoformat(),
+        'model_info': model_info,
+        'memory': process_memory(),
+        'prediction_cache': prediction_cache.stats,
+        'cwd': os.getcwd(),
+        'data_files': [f for f in os.listdir('.') if f.endswith('.json') or f.endswith('.joblib')]
+    }
+
+def render_metrics():
+    """Current metrics in the Prometheus text exposition format."""
+    MODEL_VERSION.set(model_manager.version)
+    if model_manager.load_seconds is not None:
+        MODEL_LOAD_SECONDS.set(model_manager.load_seconds)
+    stats = prediction_cache.stats
+    CACHE_LOOKUPS.set_total(stats['hits'], result='hit')
+    CACHE_LOOKUPS.set_total(stats['misses'], result='miss')
+    CACHE_ENTRIES.set(stats['size'])
+    return metrics.render()
+
 @app.route('/health', methods=['GET'])
+@instrumented('health')
 def health_check():
     try:
-        status = 'healthy' if model is not None else 'model_not_loaded'
-        model_info = {}
-        
-        if model is not None and hasattr(model, 'model'):
-            model_info['model_type'] = str(type(model.model))
-            model_info['has_scaler'] = hasattr(model, 'scaler')
-        
-        result = {
-            'status': status, 
-            'model_loaded': model is not None,
-            'timestamp': datetime.now().isoformat(),
-            'model_info': model_info,
-            'cwd': os.getcwd(),
-            'data_files': [f for f in os.listdir('.') if f.endswith('.json') or f.endswith('.joblib')]
-        }
-        
-        logger.info(f"Health check: {json.dumps(result)}")
+        result = health_status()
+        logger.debug("Health check: %s", result)
         return jsonify(result)
     except Exception as e:
         logger.error(f"Health check error: {str(e)}")
         return jsonify({'status': 'error', 'error': str(e)}), 500
 
+@app.route('/metrics', methods=['GET'])
+def metrics_endpoint():
+    """Request, stage and model metrics in the Prometheus text exposition format."""
+    return Response(render_metrics(), mimetype='text/plain; version=0.0.4')
+
+@app.route('/admin/model', methods=['GET', 'POST'])
+def admin_model():
+    """
+    Report (GET) or start (POST {"action": "train" | "reload"}) a background
+    model job. The serving model is only replaced once the candidate passes
+    holdout validation; /predict keeps using the current one meanwhile.
+    Requires MODEL_ADMIN_TOKEN to be set and sent as X-Admin-Token.
+    """
+    try:
+        if not ADMIN_TOKEN:
+            return jsonify({'error': 'Model admin is disabled; set MODEL_ADMIN_TOKEN to enable it'}), 403
+        if request.headers.get('X-Admin-Token') != ADMIN_TOKEN:
+            return jsonify({'error': 'Unauthorized'}), 401
+
+        if request.method == 'POST':
+            data = request.get_json(silent=True) or {}
+            action = data.get('action', 'train')
+            if action not in ('train', 'reload'):
+                return jsonify({'error': "action must be 'train' or 'reload'"}), 400
+
+            if not model_manager.start(action):
+                return jsonify({'error': 'A model job is already running', 'job': model_manager.status}), 409
+            logger.info(f"Started background model {action}")
+            return jsonify({'job': model_manager.status}), 202
+
+        return jsonify({
+            'job': model_manager.status,
+            'version': model_manager.version,
+            'model_loaded': model_manager.model is not None,
+            'holdout_rmse': model_manager.holdout_rmse
+        })
+    except Exception as e:
+        logger.error(f"Model admin error: {str(e)}")
+        logger.error(traceback.format_exc())
+        return jsonify({'error': str(e)}), 500
+
 @app.route('/debug', methods=['POST'])
 def debug_data():
     """Endpoint to check what data format the API is receiving"""
@@ -223,4 +681,5 @@ def debug_data():
         return jsonify({'error': str(e)}), 500
 
 if __name__ == '__main__':
+    # Development server; model_api_async.py serves /predict with micro-batching
     app.run(port=5001, debug=True)
\ No newline at end of file
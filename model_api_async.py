@@ -0,0 +1,179 @@
+"""
+Async serving mode for the dam prediction API, built on aiohttp.
+
+Concurrent /predict requests are queued and forecast in micro-batches (see
+PredictionBatcher): one model call per horizon step for every pending
+request instead of one forecast per request thread. The model, prediction
+cache, validation and metrics are shared with model_api; /health and
+/metrics are served as well. Batch, release optimization and admin
+endpoints stay on the Flask app.
+
+    python model_api_async.py --port 5001 --max-batch 64 --max-wait-ms 5
+
+PREDICT_BATCH_MAX and PREDICT_BATCH_WAIT_MS set the defaults.
+"""
+import argparse
+import os
+import time
+import traceback
+
+from aiohttp import web
+
+import model_api
+from model_api import (logger, model_manager, prediction_cache, metrics, REQUESTS, IN_FLIGHT, REQUEST_SECONDS,
+                       STAGE_SECONDS, observe_stages, log_payload, validate_prediction_request, prediction_cache_key,
+                       prediction_records, forecast_options, dam_info, health_status, render_metrics)
+from prediction_batcher import PredictionBatcher
+
+# Most requests forecast together, and how long the first of them waits for more
+PREDICT_BATCH_MAX = int(os.environ.get('PREDICT_BATCH_MAX', 64))
+PREDICT_BATCH_WAIT_MS = float(os.environ.get('PREDICT_BATCH_WAIT_MS', 5))
+
+BATCH_SIZE = metrics.histogram('dam_predict_batch_size', 'Requests forecast together in one batch',
+                               buckets=(1, 2, 4, 8, 16, 32, 64, 128, 256))
+QUEUE_WAIT = metrics.histogram('dam_predict_queue_wait_seconds', 'Queue wait of the oldest request in each batch')
+
+
+def json_response(body, status=200):
+    """JSON response encoded like Flask's jsonify, so both servers return the same documents."""
+    return web.Response(text=model_api.app.json.dumps(body), status=status, content_type='application/json')
+
+
+def record_batch(size, wait_seconds, timings):
+    BATCH_SIZE.observe(size)
+    QUEUE_WAIT.observe(wait_seconds)
+    observe_stages('predict', timings)
+
+
+@web.middleware
+async def instrumented(request, handler):
+    """Count, time and track in-flight requests per named route, like model_api.instrumented."""
+    model_manager.refresh()
+    endpoint = request.match_info.route.name
+    if endpoint is None or endpoint == 'metrics':
+        return await handler(request)
+
+    IN_FLIGHT.inc(endpoint=endpoint)
+    start = time.perf_counter()
+    status = 500
+    try:
+        response = await handler(request)
+        status = response.status
+        return response
+    except web.HTTPException as e:
+        status = e.status
+        raise
+    finally:
+        IN_FLIGHT.dec(endpoint=endpoint)
+        REQUEST_SECONDS.observe(time.perf_counter() - start, endpoint=endpoint)
+        REQUESTS.inc(endpoint=endpoint, status=status)
+
+
+async def predict(request):
+    try:
+        if request.content_type != 'application/json':
+            logger.error("Request is not JSON")
+            return json_response({'error': 'Content-Type must be application/json'}, 400)
+
+        try:
+            with STAGE_SECONDS.time(endpoint='predict', stage='parse'):
+                data = await request.json()
+            log_payload(data)
+        except Exception as json_err:
+            logger.error(f"Failed to parse JSON: {str(json_err)}")
+            return json_response({'error': 'Invalid JSON data provided'}, 400)
+
+        with STAGE_SECONDS.time(endpoint='predict', stage='validate'):
+            error_msg = validate_prediction_request(data)
+        if error_msg:
+            return json_response({'error': error_msg}, 400)
+
+        # Check if model is loaded; keep this reference for the whole request
+        model, version = model_manager.served
+        if model is None:
+            logger.error("Model not initialized")
+            return json_response({'error': 'Model not initialized. Please check server logs.'}, 500)
+
+        prediction_cache.sync(version)
+        cache_key = prediction_cache_key(version, data)
+        cached = prediction_cache.get(cache_key)
+        if cached is not None:
+            predictions_df, recommendations = cached
+            with STAGE_SECONDS.time(endpoint='predict', stage='serialize'):
+                return json_response({
+                    'predictions': prediction_records(predictions_df),
+                    'recommendations': recommendations
+                })
+
+        try:
+            quantiles, level_column = forecast_options(data)
+            predictions_df = await request.app['batcher'].predict(model, data, quantiles)
+
+            with STAGE_SECONDS.time(endpoint='predict', stage='recommendations'):
+                recommendations = model.generate_recommendations(predictions_df, dam_info(data), level_column)
+            prediction_cache.put(cache_key, (predictions_df, recommendations))
+
+            with STAGE_SECONDS.time(endpoint='predict', stage='serialize'):
+                return json_response({
+                    'predictions': predictions_df.to_dict('records'),
+                    'recommendations': recommendations
+                })
+
+        except ValueError as ve:
+            logger.error(f"Validation error during prediction: {str(ve)}")
+            return json_response({'error': str(ve)}, 400)
+        except Exception as e:
+            logger.error(f"Error during prediction: {str(e)}")
+            logger.error(traceback.format_exc())
+            return json_response({'error': 'Failed to generate predictions. Please check data format.'}, 500)
+
+    except Exception as e:
+        logger.error(f"Unexpected error: {str(e)}")
+        logger.error(traceback.format_exc())
+        return json_response({'error': 'Internal server error'}, 500)
+
+
+async def health_check(request):
+    try:
+        result = health_status()
+        result['batching'] = request.app['batcher'].stats
+        return json_response(result)
+    except Exception as e:
+        logger.error(f"Health check error: {str(e)}")
+        return json_response({'status': 'error', 'error': str(e)}, 500)
+
+
+async def metrics_endpoint(request):
+    """Request, stage, batching and model metrics in the Prometheus text exposition format."""
+    return web.Response(text=render_metrics(), headers={'Content-Type': 'text/plain; version=0.0.4'})
+
+
+def create_app(max_batch=PREDICT_BATCH_MAX, max_wait_ms=PREDICT_BATCH_WAIT_MS):
+    app = web.Application(middlewares=[instrumented])
+    app['batcher'] = PredictionBatcher(max_batch=max_batch, max_wait=max_wait_ms / 1000, on_batch=record_batch)
+
+    async def start_batcher(app):
+        await app['batcher'].start()
+
+    async def stop_batcher(app):
+        await app['batcher'].stop()
+
+    app.on_startup.append(start_batcher)
+    app.on_cleanup.append(stop_batcher)
+    app.router.add_post('/predict', predict, name='predict')
+    app.router.add_get('/health', health_check, name='health')
+    app.router.add_get('/metrics', metrics_endpoint, name='metrics')
+    return app
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Serve dam predictions with micro-batching.")
+    parser.add_argument('--host', default='0.0.0.0')
+    parser.add_argument('--port', type=int, default=5001)
+    parser.add_argument('--max-batch', type=int, default=PREDICT_BATCH_MAX,
+                        help="Most /predict requests forecast together (default: %(default)s)")
+    parser.add_argument('--max-wait-ms', type=float, default=PREDICT_BATCH_WAIT_MS,
+                        help="How long a request waits for others to batch with (default: %(default)s)")
+    args = parser.parse_args()
+
+    web.run_app(create_app(args.max_batch, args.max_wait_ms), host=args.host, port=args.port)
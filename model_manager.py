@@ -0,0 +1,225 @@
+import os
+import tempfile
+import threading
+import time
+import logging
+import traceback
+from datetime import datetime
+
+from dam_water_prediction_model import DamWaterPredictionModel, load_dam_readings
+
+logger = logging.getLogger(__name__)
+
+
+class ModelManager:
+    """
+    Owns the model served by model_api and replaces it without downtime.
+
+    Training or reloading runs on a background thread. A trained candidate
+    is fit on all but a time-ordered holdout of the readings and scored on
+    that holdout, so its RMSE is out-of-sample. It is only swapped in if that
+    RMSE is no worse than the one recorded when the serving model was
+    validated (within `rmse_tolerance`); it is then refit on all readings
+    before it is saved and served. A reloaded artifact is compared by the
+    RMSE recorded when it was validated. Without one it cannot be scored
+    out-of-sample (it was most likely trained on the holdout too), so it is
+    rejected while the serving model has a recorded RMSE. A serving model
+    without a recorded RMSE gives no baseline, and any candidate is accepted.
+
+    The swap is a single reference assignment, so requests already holding
+    the old model finish with it while new requests pick up the new one.
+
+    Accepted models are written to model_path atomically, compiled unless
+    `compiled` is False, so every worker can memory-map the same artifact.
+    Workers that did not run the job pick it up through refresh(), which
+    reloads model_path once its modification time changes.
+    """
+
+    def __init__(self, model_path, data_path, mode='recursive', holdout_fraction=0.2,
+                 rmse_tolerance=0.1, mmap_mode='r', use_cache=True, compiled=True, refresh_interval=5.0):
+        self.model_path = model_path
+        self.data_path = data_path
+        self.mode = mode
+        self.holdout_fraction = holdout_fraction
+        self.rmse_tolerance = rmse_tolerance
+        self.mmap_mode = mmap_mode
+        self.compiled = compiled
+        # Seconds between checks of model_path for a model saved by another worker
+        self.refresh_interval = refresh_interval
+        self._artifact_mtime = None
+        self._next_refresh = 0.0
+        # Load training readings through the binary column cache
+        self.use_cache = use_cache
+
+        self.model = None
+        self.version = 0
+        # (model, version) published together, for callers that key on both
+        self.served = (None, 0)
+        self.load_seconds = None
+        self.holdout_rmse = None
+
+        self._job_lock = threading.Lock()
+        self._thread = None
+        self.status = {'state': 'idle', 'action': None, 'stage': None, 'started_at': None,
+                       'finished_at': None, 'message': None}
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def load(self):
+        """Load the artifact at model_path synchronously and serve it."""
+        # Recorded first, so a broken artifact is not retried by every refresh()
+        self._artifact_mtime = os.stat(self.model_path).st_mtime_ns
+        load_start = time.perf_counter()
+        candidate = DamWaterPredictionModel(self.model_path, mmap_mode=self.mmap_mode)
+        self.load_seconds = time.perf_counter() - load_start
+        self.holdout_rmse = candidate.holdout_rmse
+        self._swap(candidate)
+        logger.info(f"Model loaded from {self.model_path} in {self.load_seconds:.3f}s")
+
+    def refresh(self):
+        """
+        Serve the artifact at model_path if another worker has replaced it.
+
+        Cheap enough to call on every request: model_path is checked at most
+        every `refresh_interval` seconds, and a changed artifact is loaded by
+        a background 'sync' job without validation (the worker that saved it
+        has validated it already).
+        """
+        now = time.monotonic()
+        if now < self._next_refresh:
+            return
+        self._next_refresh = now + self.refresh_interval
+        try:
+            mtime = os.stat(self.model_path).st_mtime_ns
+        except OSError:
+            return
+        if mtime != self._artifact_mtime:
+            self.start('sync')
+
+    def start(self, action='train'):
+        """
+        Start a background 'train', 'reload' or 'sync' job.
+
+        Returns False if a job is already running.
+        """
+        if action not in ('train', 'reload', 'sync'):
+            raise ValueError(f"Unknown model action: {action}")
+
+        with self._job_lock:
+            if self.running:
+                return False
+            self.status = {'state': 'running', 'action': action, 'stage': 'starting',
+                           'started_at': datetime.now().isoformat(), 'finished_at': None, 'message': None}
+            self._thread = threading.Thread(target=self._run, args=(action,), name=f'model-{action}', daemon=True)
+            self._thread.start()
+            return True
+
+    def wait(self, timeout=None):
+        """Block until the current background job (if any) has finished."""
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def _stage(self, stage):
+        self.status['stage'] = stage
+        logger.info(f"Model {self.status['action']}: {stage}")
+
+    def _train(self, readings):
+        model = DamWaterPredictionModel()
+        if self.mode == 'direct':
+            model.train_direct(readings)
+        else:
+            model.train(readings)
+        return model
+
+    def _save(self, model):
+        """Write model to model_path atomically, in the format workers load."""
+        fd, temp_path = tempfile.mkstemp(suffix='.tmp', dir=os.path.dirname(os.path.abspath(self.model_path)))
+        os.close(fd)
+        try:
+            model.save_model(temp_path, compiled=self.compiled)
+            os.replace(temp_path, self.model_path)
+        except BaseException:
+            os.unlink(temp_path)
+            raise
+        self._artifact_mtime = os.stat(self.model_path).st_mtime_ns
+
+    def _run(self, action):
+        try:
+            if action == 'sync':
+                self._stage('loading model')
+                self.load()
+                self._finish('succeeded', f"Serving model version {self.version} from {self.model_path}")
+                return
+
+            if action == 'train':
+                self._stage('loading data')
+                readings = load_dam_readings(self.data_path, use_cache=self.use_cache)
+                split = int(len(readings) * (1 - self.holdout_fraction))
+                history, holdout = readings.iloc[:split], readings.iloc[split:]
+
+            load_start = time.perf_counter()
+            if action == 'train':
+                self._stage('training')
+                candidate = self._train(history)
+            else:
+                self._stage('loading model')
+                # Whatever the outcome, this artifact has been considered; refresh() skips it
+                self._artifact_mtime = os.stat(self.model_path).st_mtime_ns
+                candidate = DamWaterPredictionModel(self.model_path, mmap_mode=self.mmap_mode)
+
+            # Both sides are out-of-sample: the serving model by the RMSE recorded
+            # when it was validated, a trained candidate on the holdout it never saw
+            self._stage('validating')
+            current = self.model
+            current_rmse = current.holdout_rmse if current is not None else None
+            candidate_rmse = candidate.evaluate(holdout) if action == 'train' else candidate.holdout_rmse
+            self.status['candidate_rmse'] = candidate_rmse
+            self.status['current_rmse'] = current_rmse
+
+            if candidate_rmse is None:
+                logger.warning(f"{self.model_path} has no recorded holdout RMSE; it cannot be compared "
+                               f"out-of-sample with the serving model")
+                if current_rmse is not None:
+                    self._finish('rejected', f"Artifact has no recorded holdout RMSE to compare with "
+                                             f"current {current_rmse:.4f}; retrain it instead")
+                    return
+            elif current_rmse is not None and candidate_rmse > current_rmse * (1 + self.rmse_tolerance):
+                self._finish('rejected', f"Candidate holdout RMSE {candidate_rmse:.4f} is worse than "
+                                         f"current {current_rmse:.4f}")
+                return
+
+            if action == 'train':
+                # Validated; serve a model that has also learned from the newest readings
+                self._stage('refitting')
+                candidate = self._train(readings)
+                candidate.holdout_rmse = candidate_rmse
+
+                self._stage('saving')
+                self._save(candidate)
+                # Serve the saved artifact, memory-mapped like the other workers
+                candidate = DamWaterPredictionModel(self.model_path, mmap_mode=self.mmap_mode)
+            load_seconds = time.perf_counter() - load_start
+
+            self._stage('swapping')
+            self.load_seconds = load_seconds
+            self.holdout_rmse = candidate_rmse
+            self._swap(candidate)
+            rmse = 'none recorded' if candidate_rmse is None else f"{candidate_rmse:.4f}"
+            self._finish('succeeded', f"Serving model version {self.version} (holdout RMSE {rmse})")
+        except Exception as e:
+            logger.error(f"Model {action} failed: {str(e)}")
+            logger.error(traceback.format_exc())
+            self._finish('failed', str(e))
+
+    def _swap(self, candidate):
+        version = self.version + 1
+        self.served = (candidate, version)
+        self.model = candidate
+        self.version = version
+
+    def _finish(self, state, message):
+        self.status.update({'state': state, 'stage': None, 'message': message,
+                            'finished_at': datetime.now().isoformat()})
+        logger.info(f"Model {self.status['action']} {state}: {message}")
@@ -61,6 +61,129 @@ const executePythonScript = (scriptName, args = []) => {
   });
 };
 
+// Long-lived predict_bill.py worker: loads the model once and answers
+// newline-delimited JSON requests, in order, matched to their callers by id
+let predictionWorker = null;
+let nextPredictionId = 0;
+
+// A request not answered within this many ms is rejected; after this many
+// timeouts in a row the worker is presumed hung, killed and respawned
+const PREDICTION_TIMEOUT_MS = Number(process.env.PREDICTION_TIMEOUT_MS) || 10000;
+const MAX_PREDICTION_TIMEOUTS = 3;
+
+const startPredictionWorker = (scriptPath) => {
+  const worker = spawn('python', [scriptPath, '--serve'], { cwd: pythonDir });
+  worker.pending = new Map();
+  // Ids in the order they were sent, including timed-out ones; each response
+  // line answers the oldest of them
+  worker.sent = [];
+  worker.timeouts = 0;
+  let buffered = '';
+
+  const take = (id) => {
+    const request = worker.pending.get(id);
+    if (request) {
+      clearTimeout(request.timer);
+      worker.pending.delete(id);
+    }
+    return request;
+  };
+
+  // Reject everything still waiting on this worker; the next request starts a new one
+  const fail = (error) => {
+    if (predictionWorker === worker) {
+      predictionWorker = null;
+    }
+    for (const id of [...worker.pending.keys()]) {
+      take(id).reject(error);
+    }
+    worker.sent = [];
+  };
+
+  worker.request = (inputData, resolve, reject) => {
+    const id = nextPredictionId++;
+    const timer = setTimeout(() => {
+      take(id);
+      reject(new Error(`Prediction timed out after ${PREDICTION_TIMEOUT_MS} ms`));
+      worker.timeouts += 1;
+      if (worker.timeouts >= MAX_PREDICTION_TIMEOUTS) {
+        console.error(`Prediction worker timed out ${worker.timeouts} times in a row; restarting it`);
+        fail(new Error('Prediction worker stopped responding'));
+        worker.kill('SIGKILL');
+      }
+    }, PREDICTION_TIMEOUT_MS);
+    worker.pending.set(id, { resolve, reject, timer });
+    worker.sent.push(id);
+    worker.stdin.write(JSON.stringify({ ...inputData, id }) + '\n');
+  };
+
+  worker.stdout.on('data', (data) => {
+    buffered += data.toString();
+    const lines = buffered.split('\n');
+    buffered = lines.pop();
+
+    for (const line of lines) {
+      if (!line.trim()) {
+        continue;
+      }
+      let response;
+      try {
+        response = JSON.parse(line);
+      } catch (error) {
+        response = null;
+      }
+      worker.timeouts = 0;
+
+      if (response === null || response.id === undefined) {
+        // Unmatched, but answers the oldest request sent; fail that one rather than leave it waiting
+        console.error('Invalid response from prediction worker:', line);
+        const request = take(worker.sent.shift());
+        if (request) {
+          request.reject(new Error('Invalid response from prediction worker'));
+        }
+        continue;
+      }
+
+      const { id, ...result } = response;
+      const position = worker.sent.indexOf(id);
+      if (position !== -1) {
+        worker.sent.splice(0, position + 1);
+      }
+      const request = take(id);
+      if (request) {
+        request.resolve(result);
+      }
+    }
+  });
+
+  worker.stderr.on('data', (data) => {
+    console.error(`predict_bill worker: ${data.toString().trim()}`);
+  });
+
+  worker.stdin.on('error', fail);
+  worker.on('error', fail);
+  worker.on('exit', (code) => {
+    fail(new Error(`Prediction worker exited with code ${code}`));
+  });
+
+  return worker;
+};
+
+const predictWithWorker = (inputData) => {
+  return new Promise((resolve, reject) => {
+    if (!predictionWorker) {
+      const scriptPath = path.join(pythonDir, 'predict_bill.py');
+      if (!fs.existsSync(scriptPath)) {
+        reject(new Error(`Python script not found: ${scriptPath}`));
+        return;
+      }
+      predictionWorker = startPredictionWorker(scriptPath);
+    }
+
+    predictionWorker.request(inputData, resolve, reject);
+  });
+};
+
 // Get historical electricity usage data
 router.get('/history', async (req, res) => {
   try {
@@ -79,15 +202,8 @@ router.post('/predict', async (req, res) => {
     // Extract input data from request body
     const inputData = req.body;
     
-    // Save input data to a temporary JSON file
-    const tempFilePath = path.join(pythonDir, 'temp_input.json');
-    fs.writeFileSync(tempFilePath, JSON.stringify(inputData));
-    
-    // Call Python script for prediction
-    const result = await executePythonScript('predict_bill.py', [tempFilePath]);
-    
-    // Clean up temporary file
-    fs.unlinkSync(tempFilePath);
+    // Ask the persistent prediction worker
+    const result = await predictWithWorker(inputData);
     
     res.json(result);
   } catch (error) {
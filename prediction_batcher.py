@@ -0,0 +1,220 @@
+import asyncio
+import time
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class _Pending:
+    """One queued forecast request and the future its caller awaits."""
+
+    __slots__ = ('model', 'data', 'quantiles', 'future', 'enqueued')
+
+    def __init__(self, model, data, quantiles, future):
+        self.model = model
+        self.data = data
+        self.quantiles = quantiles
+        self.future = future
+        self.enqueued = time.perf_counter()
+
+
+class PredictionBatcher:
+    """
+    Micro-batches concurrent forecast requests on an asyncio event loop.
+
+    Callers `await predict(model, data, quantiles)`. Requests are queued and
+    collected for up to `max_wait` seconds after the first one arrives, or
+    until `max_batch` are pending, and then forecast together with
+    predict_future_levels_batch, which makes one model call per horizon step
+    for the whole batch. Forecasts run on a small thread pool so the event
+    loop keeps accepting requests; while a batch runs, the next one fills up.
+
+    Requests for different models (e.g. across a hot swap) or quantile
+    settings are forecast in separate groups. If a batch fails, its requests
+    are retried one by one so a single bad payload only fails its own caller.
+
+    `on_batch(size, wait_seconds, timings)` is called after every group with
+    its size, the queue wait of its oldest request and the model's stage timings.
+    """
+
+    def __init__(self, max_batch=64, max_wait=0.005, workers=1, on_batch=None):
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.on_batch = on_batch
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='forecast')
+        self._slots = asyncio.Semaphore(workers)
+        self._queue = None
+        self._collector = None
+        self._running = set()
+
+        self.requests = 0
+        self.batches = 0
+
+    async def start(self):
+        self._queue = asyncio.Queue()
+        self._collector = asyncio.create_task(self._collect())
+
+    async def stop(self):
+        """Stop collecting, wait for running batches and shut the thread pool down."""
+        if self._collector:
+            self._collector.cancel()
+            try:
+                await self._collector
+            except asyncio.CancelledError:
+                pass
+        if self._running:
+            await asyncio.gather(*self._running, return_exceptions=True)
+        self._executor.shutdown(wait=True)
+
+    async def predict(self, model, data, quantiles=None):
+        """Forecast one /predict payload with `model`; returns its predictions DataFrame."""
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put(_Pending(model, data, quantiles, future))
+        return await future
+
+    @property
+    def stats(self):
+        return {
+            'max_batch': self.max_batch,
+            'max_wait_ms': self.max_wait * 1000,
+            'requests': self.requests,
+            'batches': self.batches,
+            'mean_batch_size': self.requests / self.batches if self.batches else None,
+            'queued': self._queue.qsize() if self._queue else 0,
+        }
+
+    async def _collect(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.max_wait
+            while len(batch) < self.max_batch:
+                try:
+                    batch.append(self._queue.get_nowait())
+                    continue
+                except asyncio.QueueEmpty:
+                    pass
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            # Keep at most `workers` batches in flight; later requests keep queueing
+            await self._slots.acquire()
+            task = asyncio.create_task(self._run(batch))
+            self._running.add(task)
+            task.add_done_callback(self._running.discard)
+
+    async def _run(self, batch):
+        try:
+            groups = {}
+            for pending in batch:
+                if not pending.future.cancelled():
+                    groups.setdefault((id(pending.model), pending.quantiles), []).append(pending)
+
+            loop = asyncio.get_running_loop()
+            for group in groups.values():
+                start = time.perf_counter()
+                timings = {}
+                results = await loop.run_in_executor(self._executor, _forecast_group, group, timings)
+                self.requests += len(group)
+                self.batches += 1
+                if self.on_batch:
+                    self.on_batch(len(group), start - group[0].enqueued, timings)
+
+                for pending, (predictions, error) in zip(group, results):
+                    if pending.future.done():
+                        continue
+                    if error is not None:
+                        pending.future.set_exception(error)
+                    else:
+                        pending.future.set_result(predictions)
+        finally:
+            self._slots.release()
+
+
+def _forecast_group(group, timings):
+    """Forecast a group sharing model and quantiles; returns (predictions, error) per request."""
+    model, quantiles = group[0].model, group[0].quantiles
+    try:
+        predictions = model.predict_future_levels_batch([pending.data for pending in group], timings=timings,
+                                                        quantiles=quantiles)
+        return [(frame, None) for frame in predictions]
+    except Exception as batch_error:
+        if len(group) == 1:
+            return [(None, batch_error)]
+        logger.warning(f"Batch of {len(group)} forecasts failed ({batch_error}), retrying one by one")
+
+    results = []
+    for pending in group:
+        try:
+            results.append((model.predict_future_levels(pending.data, timings=timings, quantiles=quantiles), None))
+        except Exception as e:
+            results.append((None, e))
+    return results
+
+
+def compare_batching(model, payloads, concurrency=(1, 8, 32, 128), max_waits=(0.0, 0.002, 0.005, 0.02),
+                     max_batch=64, requests_per_client=20):
+    """
+    Throughput and latency of batched forecasts under concurrent load.
+
+    For every concurrency level, `concurrency` clients each send
+    `requests_per_client` requests back to back (cycling through `payloads`)
+    through a PredictionBatcher with each `max_wait`; max_wait=0 only batches
+    requests that are already queued. Returns one row per combination with
+    requests per second, p50/p99 latency in milliseconds and the mean batch size.
+    """
+
+    async def run(clients, max_wait):
+        batcher = PredictionBatcher(max_batch=max_batch, max_wait=max_wait)
+        await batcher.start()
+        latencies = []
+
+        async def client(offset):
+            for i in range(requests_per_client):
+                start = time.perf_counter()
+                await batcher.predict(model, payloads[(offset + i) % len(payloads)])
+                latencies.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(client(c) for c in range(clients)))
+        elapsed = time.perf_counter() - start
+        stats = batcher.stats
+        await batcher.stop()
+        return {
+            'concurrency': clients,
+            'max_wait_ms': max_wait * 1000,
+            'requests_per_second': len(latencies) / elapsed,
+            'p50_ms': float(np.percentile(latencies, 50) * 1000),
+            'p99_ms': float(np.percentile(latencies, 99) * 1000),
+            'mean_batch_size': stats['mean_batch_size'],
+        }
+
+    return [asyncio.run(run(clients, max_wait)) for clients in concurrency for max_wait in max_waits]
+
+
+if __name__ == '__main__':
+    import json
+    from dam_water_prediction_model import DamWaterPredictionModel
+
+    with open('synthetic_dam_readings.json') as f:
+        readings = json.load(f)
+    dam_model = DamWaterPredictionModel('dam_model_improved.joblib')
+    payloads = [{
+        'historicalData': readings[i - 24:i],
+        'currentLevel': readings[i]['waterLevel'],
+        'flowRate': readings[i]['flowRate'],
+        'precipitation': readings[i]['precipitation'],
+    } for i in range(24, len(readings))]
+
+    print(f"{'clients':>8} {'wait ms':>8} {'req/s':>9} {'p50 ms':>9} {'p99 ms':>9} {'batch':>7}")
+    for row in compare_batching(dam_model, payloads):
+        print(f"{row['concurrency']:>8} {row['max_wait_ms']:>8.1f} {row['requests_per_second']:>9.1f} "
+              f"{row['p50_ms']:>9.2f} {row['p99_ms']:>9.2f} {row['mean_batch_size']:>7.1f}")